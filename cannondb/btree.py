@@ -1,15 +1,17 @@
-import bisect
 import logging
-import math
+from operator import itemgetter
 from typing import Iterable
 
 from cannondb.constants import TreeConf, DEFAULT_LOGGER_NAME
 from cannondb.handler import FileHandler
-from cannondb.node import BNode
+from cannondb.node import BNode, KeyValPair
 from cannondb.utils import refine_to_2power
 
 logger = logging.getLogger(DEFAULT_LOGGER_NAME)
 
+_first, _second = itemgetter(0), itemgetter(1)
+_NO_KEY = object()  # equal to no key
+
 
 class DBNotOpenError(Exception):
     """Raise when trying to do ops but storage was closed"""
@@ -23,7 +25,7 @@ class BTree(object):
     I choose B Tree rather than B+ Tree because complexity is a big issue, edge cases casually destroy
     the program. And theoretically, B Tree improve the random read/write efficiency :)
     """
-    __slots__ = ('_file_name', '_order', '_root', '_bottom', '_tree_conf', 'handler', '_closed')
+    __slots__ = ('_file_name', '_order', '_min_elements', '_root', '_tree_conf', 'handler', '_closed')
     BRANCH = LEAF = BNode
 
     def __init__(self, file_name: str = 'database', order=100, page_size: int = 8192, key_size: int = 16,
@@ -33,13 +35,14 @@ class BTree(object):
                                    key_size=refine_to_2power(key_size), value_size=refine_to_2power(value_size))
         self.handler = FileHandler(file_name, self._tree_conf, cache_size=refine_to_2power(cache_size))
         self._order = order
+        self._min_elements = (order + 1) // 2  # ceil of half order in int math, order is read only
         try:  # create new root or load previous root
             with self.handler.read_transaction:
                 meta_root_page, meta_tree_conf = self.handler.get_meta_tree_conf()
         except ValueError:
             #  init empty test_tree
             with self.handler.write_transaction:
-                self._root = self._bottom = self.LEAF(self, self._tree_conf)
+                self._root = self.LEAF(self, self._tree_conf)
                 self.handler.ensure_root_block(self._root)
         else:
             with self.handler.read_transaction:
@@ -50,32 +53,28 @@ class BTree(object):
     def _path_to(self, key):
         """
         Get the path from root to target-node.
-        :return: list of node-path from root to key-node.
+        :return: list of node-path from root to key-node, and whether key exists in the last node.
+                 path ends in a leaf when key doesn't exist.
         """
         with self.handler.read_transaction:
             current = self._root
             ancestry = []
+            get_node = self.handler.get_node  # bound once rather than looked up at every level
 
-            while getattr(current, 'children', None):
-                index = bisect.bisect_left(current.contents, key)
+            while True:
+                index, found = current.find(key)
                 ancestry.append((current, index))
-                if index < len(current.contents) \
-                        and current.contents[index].key == key:
-                    return ancestry
-                current = self.handler.get_node(current.children[index], tree=self)
-
-            index = bisect.bisect_left(current.contents, key)
-            ancestry.append((current, index))
-
-            return ancestry
-
-    @staticmethod
-    def _present(key, ancestors) -> bool:
-        """
-        Judge if key exists in this tree.
-        """
-        last, index = ancestors[-1]
-        return index < len(last.contents) and last.contents[index].key == key
+                if found or not current.children:
+                    return ancestry, found
+                current = get_node(current.children[index], tree=self)
+
+    def _update(self, node, index, key, value, override):
+        """set value of key existing at index of node"""
+        if not override:
+            raise ValueError('{key} has existed'.format(key=key))
+        node.contents[index].value = value
+        node.update_content_in_dump(index, node.contents[index])
+        self.handler.set_node(node)
 
     def insert(self, key, value, override=False):
         """
@@ -84,22 +83,12 @@ class BTree(object):
         :param override: if override is true and key has existed, the new
                          value will override the old one.
         """
-        ancestors = self._path_to(key)
-        node, index = ancestors[-1]
+        ancestors, found = self._path_to(key)
+        node, index = ancestors.pop()
         with self.handler.write_transaction:
-            if BTree._present(key, ancestors):
-                if not override:
-                    raise ValueError('{key} has existed'.format(key=key))
-                else:
-                    node.contents[index].value = value
-                    node.update_content_in_dump(index, node.contents[index])
-                    self.handler.set_node(node)
+            if found:
+                self._update(node, index, key, value, override)
             else:
-                while getattr(node, 'children', None):
-                    node = self.handler.get_node(node.children[index], tree=self)
-                    index = bisect.bisect_left(node.contents, key)
-                    ancestors.append((node, index))
-                node, index = ancestors.pop()
                 node.insert(index, key, value, ancestors)
 
     def multi_insert(self, pairs: Iterable, override=False):
@@ -111,14 +100,105 @@ class BTree(object):
         with self.handler.write_transaction:
             if not isinstance(pairs, Iterable):
                 raise TypeError('pairs should be a iterable object')
-            elif isinstance(pairs, dict):
-                for key, value in pairs.items():
-                    self.insert(key, value, override)
+            elif not self._root.contents:
+                # nothing to merge with, an empty tree is built bottom-up by one pass like bulk load does.
+                self._build(self._sorted_unique_pairs(pairs.items() if isinstance(pairs, dict) else pairs, override))
+            else:
+                # dict batches go through sorted runs too, rather than one insert per key.
+                # sorted into a new list, caller's batch is left as it is.
+                self._insert_sorted(sorted(pairs.items() if isinstance(pairs, dict) else pairs, key=_first), override)
+
+    def _insert_sorted(self, pairs: list, override: bool):
+        """
+        insert pairs in order, new keys which all fall into the same gap of one leaf are
+        inserted as a run, so that leaf is dumped and shrunk once per run instead of once per key.
+        """
+        i = 0
+        while i < len(pairs):
+            key, value = pairs[i]
+            ancestors, found = self._path_to(key)
+            node, index = ancestors.pop()
+            if found:
+                self._update(node, index, key, value, override)
+                i += 1
+                continue
+            # the run ends before the nearest key greater than this one, in the leaf or in its ancestors.
+            bound = node.key_at(index) if index < len(node.contents) else None
+            if bound is None:
+                for ancestor, ancestor_index in reversed(ancestors):
+                    if ancestor_index < len(ancestor.contents):
+                        bound = ancestor.key_at(ancestor_index)
+                        break
+            # a node merged by `grow` of odd order may hold `order + 1` pairs already, it takes one like `insert`.
+            room = max(self._tree_conf.order + 1 - len(node.contents), 1)
+            run, i = [KeyValPair(self._tree_conf, key, value)], i + 1
+            while i < len(pairs) and len(run) < room and pairs[i - 1][0] < pairs[i][0] and \
+                    (bound is None or pairs[i][0] < bound):
+                run.append(KeyValPair(self._tree_conf, pairs[i][0], pairs[i][1]))
+                i += 1
+            node.bulk_insert_sorted(index, run, ancestors)
+
+    def bulk_load(self, pairs: Iterable):
+        """
+        Build the tree from a batch of key-value pairs bottom-up, every node is filled and dumped
+        only once, there is no split or re-balance at all. Much faster than inserting one by one.
+        Only an empty tree can be bulk loaded, and keys must be unique.
+        """
+        with self.handler.write_transaction:
+            if self._root.contents:
+                raise ValueError('Only empty tree can be bulk loaded')
+            if not isinstance(pairs, Iterable):
+                raise TypeError('pairs should be a iterable object')
+            if isinstance(pairs, dict):
+                pairs = pairs.items()
+            self._build(self._sorted_unique_pairs(pairs, override=False))
+
+    def _sorted_unique_pairs(self, pairs: Iterable, override: bool) -> list:
+        """
+        pairs sorted by key, of a key given more than once the last value is taken if override is true,
+        else ValueError is raised.
+        """
+        items = []
+        last_key = _NO_KEY
+        # stable, equal keys keep their order. pairs already sorted cost timsort one linear pass.
+        for key, value in sorted(pairs, key=_first):
+            if key == last_key:
+                if not override:
+                    raise ValueError('{key} has existed'.format(key=key))
+                items[-1].value = value
             else:
-                if hasattr(pairs, 'sort'):
-                    pairs.sort(key=lambda p: p[0])  # sort by key
-                for key, value in pairs:
-                    self.insert(key, value, override)
+                items.append(KeyValPair(self._tree_conf, key, value))
+                last_key = key
+        return items
+
+    def _build(self, items: list):
+        """build the empty tree from sorted and unique pairs bottom-up"""
+        if not items:
+            return
+        children = []  # pages of nodes in level below
+        while True:
+            # split items of this level into nodes evenly, one item between every two nodes goes up.
+            nodes = -(-(len(items) + 1) // (self.order + 1))
+            if nodes == 1:
+                break
+            size, extra = divmod(len(items) - nodes + 1, nodes)
+            upper_items, upper_children = [], []
+            start = 0
+            for i in range(nodes):
+                end = start + size + (i < extra)
+                node = (self.BRANCH if children else self.LEAF)(
+                    tree=self, tree_conf=self._tree_conf, contents=items[start:end],
+                    children=children[start:end + 1])
+                self.handler.set_node(node)
+                upper_children.append(node.page)
+                if i < nodes - 1:
+                    upper_items.append(items[end])
+                start = end + 1
+            items, children = upper_items, upper_children
+        # top node takes the place of the empty root
+        self._root = (self.BRANCH if children else self.LEAF)(
+            tree=self, tree_conf=self._tree_conf, contents=items, children=children, page=self._root.page)
+        self.handler.ensure_root_block(self._root)
 
     def multi_read(self, keys: Iterable) -> dict:
         """
@@ -135,26 +215,30 @@ class BTree(object):
         """
         Remove target key in database.
         """
-        ancestors = self._path_to(key)
+        ancestors, found = self._path_to(key)
 
-        if BTree._present(key, ancestors):
+        if found:
             node, index = ancestors.pop()
             with self.handler.write_transaction:
                 node.remove(index, ancestors)
         else:
             raise KeyError('{key} not in {self}'.format(key=key, self=self.__class__.__name__))
 
-    def _get(self, key):
+    def _locate(self, key):
         """
-        Internal impl of get(), return target value if key exists, else raise exception.
+        Find the node holding key and its index in node, or None if key doesn't exist.
+        Lookups descend without recording the path, only writers need ancestors.
         """
-        ancestor = self._path_to(key)
-        node, index = ancestor[-1]
-
-        if BTree._present(key, ancestor):
-            yield node.contents[index].value
-        else:
-            raise StopIteration
+        with self.handler.read_transaction:
+            node = self._root
+            get_node = self.handler.get_node
+            while True:
+                index, found = node.find(key)
+                if found:
+                    return node, index
+                if not node.children:
+                    return None
+                node = get_node(node.children[index], tree=self)
 
     def get(self, key, default=None):
         """
@@ -162,25 +246,29 @@ class BTree(object):
         :param default: if key doesn't exist, return default.
         :return: value corresponding to the key if key exists.
         """
-        try:
-            return next(self._get(key))
-        except StopIteration:
-            return default
+        # same descent as `_locate`, inlined since lookups are the hottest path.
+        with self.handler.read_transaction:
+            node = self._root
+            get_node = self.handler.get_node
+            while True:
+                index, found = node.find(key)
+                if found:
+                    return node.value_at(index)
+                if not node.children:
+                    return default
+                node = get_node(node.children[index], tree=self)
 
     def _iteritems(self):
         """Internal iterator of iteritems()"""
-        for item in self:
-            yield item
+        return iter(self)
 
     def _iterkeys(self):
-        """Internal iterator of iterkeys()"""
-        for pair in self:
-            yield pair[0]
+        """Internal iterator of iterkeys(), values are never decoded"""
+        return self._walk(None, None, BNode.iter_keys)
 
     def _itervalues(self):
         """Internal iterator of itervalues()"""
-        for pair in self:
-            yield pair[1]
+        return map(_second, self)
 
     def keys(self) -> list:
         return list(self._iterkeys())
@@ -197,42 +285,84 @@ class BTree(object):
 
     def __contains__(self, key):
         """Support for keyword 'in' operator."""
-        return BTree._present(key, self._path_to(key))
+        return self._locate(key) is not None
 
     def __iter__(self):
         """
         Support iterating B tree by yielding a key-value pair each time.
         """
+        return self.range()
 
-        def _recurse(node):
-            if node.children:
-                for child, it in zip(node.children, node.contents):
-                    for child_item in _recurse(self.handler.get_node(child, tree=self)):
-                        yield child_item
-                    yield it.key, it.value
-                for child_item in _recurse(self.handler.get_node(node.children[-1], tree=self)):
-                    yield child_item
-            else:
-                for it in node.contents:
-                    yield it.key, it.value
+    def range(self, start=None, stop=None):
+        """
+        Yield key-value pairs in order whose keys lie in [start, stop), a bound of None is open.
+        Tree is descended to start once, then walked in order, rather than searched for every key.
+        """
+        return self._walk(start, stop, BNode.iter_items)
 
+    def _walk(self, start, stop, iter_node):
+        """
+        Walk of `range`, items of each node come from `iter_node(node, index)`.
+        Items are key-value pairs, or bare keys when nodes are iterated by `BNode.iter_keys`.
+        """
+        keys_only = iter_node is BNode.iter_keys
+        # walk with an explicit stack in one generator, nested generators re-yield every item once per level.
         with self.handler.read_transaction:
-            for item in _recurse(self._root):
+            get_node = self.handler.get_node
+            # items and children left of branches on the way down.
+            stack = []
+            node = self._root
+            while True:
+                # only the first descent is positioned by start, subtrees after it are walked from their heads.
+                index = node.bisect(start) if start is not None else 0
+                while node.children:
+                    children = iter(node.children[index:] if index else node.children)
+                    stack.append((iter_node(node, index), children))
+                    node = get_node(next(children), tree=self)
+                    index = node.bisect(start) if start is not None else 0
+                start = None
+                if stop is None:
+                    yield from iter_node(node, index)
+                else:
+                    for item in iter_node(node, index):
+                        if (item if keys_only else item[0]) >= stop:
+                            return
+                        yield item
+                # climb up to the nearest branch having items left
+                while stack:
+                    items, children = stack[-1]
+                    item = next(items, None)
+                    if item is not None:
+                        break
+                    stack.pop()
+                else:
+                    return
+                if stop is not None and (item if keys_only else item[0]) >= stop:
+                    return
                 yield item
+                node = get_node(next(children), tree=self)
 
     def __repr__(self):
         def recurse(node, all_items, depth):
             all_items.append((' ' * depth) + repr(node))
-            for node in self.handler.get_node(getattr(node, 'children', list())):
-                recurse(node, all_items, depth + 1)
+            for child in node.children:
+                recurse(self.handler.get_node(child, tree=self), all_items, depth + 1)
 
         _all = list()
         recurse(self._root, _all, 0)
         return '\n'.join(_all)
 
     def __len__(self):
-        """Support for len() built-in function."""
-        return len([_ for _ in self])
+        """Support for len() built-in function, pairs are counted by nodes without being decoded."""
+        with self.handler.read_transaction:
+            get_node = self.handler.get_node
+            count = 0
+            nodes = [self._root]
+            while nodes:
+                node = nodes.pop()
+                count += len(node.contents)
+                nodes.extend(get_node(child, tree=self) for child in node.children)
+            return count
 
     def __setitem__(self, key, value):
         self.insert(key, value, override=True)
@@ -278,7 +408,7 @@ class BTree(object):
     @property
     def min_elements(self):
         """Minimum number of elements in each node."""
-        return math.ceil(self.order / 2)
+        return self._min_elements
 
     @property
     def is_open(self):
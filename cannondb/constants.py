@@ -2,7 +2,8 @@ from collections import namedtuple
 
 __all__ = ['PAGE_ADDRESS_LIMIT', 'PAGE_LENGTH_LIMIT', 'PAGE_ADDRESS_FORMAT', 'ENDIAN', 'KEY_LENGTH_LIMIT',
            'KEY_LENGTH_FORMAT', 'VALUE_LENGTH_FORMAT', 'VALUE_LENGTH_LIMIT', 'NODE_TYPE_LENGTH_LIMIT',
-           'SERIALIZER_TYPE_LENGTH_LIMIT', 'NODE_CONTENTS_LENGTH_LIMIT', 'INT_FORMAT', 'FLOAT_FORMAT',
+           'NODE_TYPE_FORMAT', 'SERIALIZER_TYPE_LENGTH_LIMIT', 'SERIALIZER_TYPE_FORMAT', 'NODE_CONTENTS_LENGTH_LIMIT',
+           'NODE_CONTENTS_LENGTH_FORMAT', 'INT_FORMAT', 'FLOAT_FORMAT', 'FRAME_TYPE_FORMAT',
            'FRAME_TYPE_LENGTH_LIMIT', 'DEFAULT_LOGGER_NAME', 'METHODS_TO_LOG', 'TreeConf', 'DEFAULT_CHECKPOINT_SECONDS',
            'DEFAULT_SEM_VAL','SERVER_PORT']
 
@@ -25,16 +26,20 @@ VALUE_LENGTH_FORMAT = '!I'
 KEY_LENGTH_LIMIT = 2
 VALUE_LENGTH_LIMIT = 4
 
-# bytes for storing node type
+# bytes for storing node type: unsigned char, size=1
+NODE_TYPE_FORMAT = '!B'
 NODE_TYPE_LENGTH_LIMIT = 1
 
-# bytes for storing node contents size
+# bytes for storing node contents size: unsigned short, big-endian, size=2
+NODE_CONTENTS_LENGTH_FORMAT = '!H'
 NODE_CONTENTS_LENGTH_LIMIT = 2
 
-# bytes for storing serializer type
+# bytes for storing serializer type: unsigned char, size=1
+SERIALIZER_TYPE_FORMAT = '!B'
 SERIALIZER_TYPE_LENGTH_LIMIT = 1
 
-# bytes for storing per frame used in WAL module
+# bytes for storing per frame used in WAL module: unsigned char, size=1
+FRAME_TYPE_FORMAT = '!B'
 FRAME_TYPE_LENGTH_LIMIT = 1
 
 INT_FORMAT = '!l'
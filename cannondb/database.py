@@ -78,6 +78,14 @@ class CannonDB(with_metaclass(ABCMeta)):
         """Get all key-value pairs stored in database."""
         return self._storage.items()
 
+    def range(self, start=None, stop=None):
+        """
+        Iterate key-value pairs in order of keys.
+        :param start: smallest key included, None means from the first key.
+        :param stop: keys not smaller than it are excluded, None means to the last key.
+        """
+        return self._storage.range(start, stop)
+
     def get(self, key, default=None):
         """
         :param key: key expected to be searched in the tree.
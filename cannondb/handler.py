@@ -3,17 +3,38 @@ import enum
 import io
 import logging
 import os
+import struct
 from typing import Union
 
 import rwlock
 
 from cannondb.constants import *
 from cannondb.node import BNode, BaseBNode, OverflowNode
-from cannondb.utils import LRUCache, FakeCache, open_database_file, read_from_file, write_to_file, \
-    file_flush_and_sync, EndOfFileError
+from cannondb.utils import LRUCache, FakeCache, open_database_file, read_from_file, pread_from_file, \
+    write_to_file, file_flush_and_sync, EndOfFileError
 
 logger = logging.getLogger(DEFAULT_LOGGER_NAME)
 
+# header of each WAL frame: frame type | page, compiled once instead of int.from_bytes/to_bytes per field.
+_FRAME_HEADER = struct.Struct('!' + FRAME_TYPE_FORMAT.lstrip('!') + PAGE_ADDRESS_FORMAT.lstrip('!'))
+# tree conf in meta page: root page | order (1 byte) and page size (3 bytes) share one word | key size | value size
+_META_HEADER = struct.Struct('!' + PAGE_ADDRESS_FORMAT.lstrip('!') + 'I' + KEY_LENGTH_FORMAT.lstrip('!') +
+                             VALUE_LENGTH_FORMAT.lstrip('!'))
+
+
+class _ReadTransaction(object):
+    """read transaction of a handler, holds nothing but the read lock, so it's built once and reused"""
+    __slots__ = ('_reader_lock',)
+
+    def __init__(self, reader_lock):
+        self._reader_lock = reader_lock
+
+    def __enter__(self):
+        self._reader_lock.acquire()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._reader_lock.release()
+
 
 class FileHandler(object):
     """
@@ -21,7 +42,13 @@ class FileHandler(object):
     the organization of data in real file.
     """
     __slots__ = ('_filename', '_tree_conf', '_cache', '_fd', '_wal', '_lock',
-                 'last_page', '_page_GC', '_auto_commit')
+                 'last_page', '_page_GC', '_auto_commit', '_dirty_nodes', '_write_depth', '_read_transaction',
+                 '_pending_root')
+
+    # bytes of db file read at one time when looking for deprecated pages on open
+    GC_SCAN_BYTES = 1 << 22
+    # at most bytes of consecutive pages written back by one write on checkpoint
+    CHECKPOINT_RUN_BYTES = 1 << 20
 
     def __init__(self, file_name, tree_conf: TreeConf, cache_size=1024):
         self._filename = file_name
@@ -35,6 +62,7 @@ class FileHandler(object):
             self._cache = LRUCache(capacity=cache_size)
         self._fd = open_database_file(self._filename)
         self._lock = rwlock.RWLock()
+        self._read_transaction = _ReadTransaction(self._lock.reader_lock)
         self._wal = WAL(file_name, tree_conf.page_size)
 
         # Get the last available page
@@ -43,6 +71,10 @@ class FileHandler(object):
         self.last_page = int(last_byte / self._tree_conf.page_size)
         self._page_GC = list(self._load_page_gc())
         self._auto_commit = True
+        # nodes set during a write transaction, written into WAL once when it ends.
+        self._dirty_nodes = dict()
+        self._write_depth = 0
+        self._pending_root = None  # root changed during a write transaction, recorded when it ends
 
     @property
     def write_transaction(self):
@@ -54,17 +86,26 @@ class FileHandler(object):
         class WriteTransaction:
             def __enter__(_self):
                 self._lock.writer_lock.acquire()
+                self._write_depth += 1
 
             def __exit__(_self, exc_type, exc_val, exc_tb):
+                self._write_depth -= 1
                 # When some emergency happens in the middle of a write
                 # transaction we must roll it back and clear the cache
                 # because the writer may have partially modified the Nodes
                 if exc_type:
+                    self._dirty_nodes.clear()
+                    self._pending_root = None
                     self._wal.rollback()
                     self._cache.clear()
-                else:
-                    if self._auto_commit:
-                        self._wal.commit()
+                elif not self._write_depth:  # nested transactions are written and committed by outermost one
+                    if self._pending_root is not None:
+                        root, self._pending_root = self._pending_root, None
+                        self._commit_root(root)
+                    else:
+                        self._write_dirty_nodes()
+                        if self._auto_commit:
+                            self._wal.commit()
                 self._lock.writer_lock.release()
 
         return WriteTransaction()
@@ -74,15 +115,9 @@ class FileHandler(object):
         """
         Simulation of write transaction, implemented by read lock.
         Multi-readers are absolutely safe so no more measurements are required.
+        It holds no state of its own, one instance is shared by every read.
         """
-        class ReadTransaction:
-            def __enter__(_self):
-                self._lock.reader_lock.acquire()
-
-            def __exit__(_self, exc_type, exc_val, exc_tb):
-                self._lock.reader_lock.release()
-
-        return ReadTransaction()
+        return self._read_transaction
 
     def _fd_seek_end(self):
         self._fd.seek(0, io.SEEK_END)
@@ -92,8 +127,8 @@ class FileHandler(object):
         Read No.page raw binary data from db file
         """
         page_start = page * self._tree_conf.page_size
-        data = read_from_file(self._fd, page_start,
-                              page_start + self._tree_conf.page_size)
+        data = pread_from_file(self._fd, page_start,
+                               page_start + self._tree_conf.page_size)
         return data
 
     def _write_page_data(self, page: int, page_data: bytes, f_sync=False):
@@ -106,13 +141,26 @@ class FileHandler(object):
         self._fd.seek(page_start)
         write_to_file(self._fd, page_data, f_sync=f_sync)
 
+    def _write_pages_data(self, first_page: int, pages_data: list):
+        """write data of consecutive pages from No.first_page in db file by one write"""
+        self._fd.seek(first_page * self._tree_conf.page_size)
+        write_to_file(self._fd, pages_data[0] if len(pages_data) == 1 else b''.join(pages_data))
+
     def _load_page_gc(self):
-        """Load all deprecated pages used before into memory."""
-        for offset in range(1, self.last_page):
-            page_start = offset * self._tree_conf.page_size
-            page_type = read_from_file(self._fd, page_start, page_start + NODE_TYPE_LENGTH_LIMIT)
-            if page_type == 2:  # _PageType.DEPRECATED_PAGE._value==2
-                yield offset
+        """
+        Load all deprecated pages used before into memory. Pages are read in big chunks, type bytes of
+        pages in a chunk are picked out by one stride slice rather than one read per page.
+        """
+        page_size = self._tree_conf.page_size
+        chunk_pages = max(1, self.GC_SCAN_BYTES // page_size)
+        for first in range(1, self.last_page, chunk_pages):
+            last = min(first + chunk_pages, self.last_page)
+            data = read_from_file(self._fd, first * page_size, (last - 1) * page_size + NODE_TYPE_LENGTH_LIMIT)
+            page_types = data[::page_size]
+            index = page_types.find(2)  # _PageType.DEPRECATED_PAGE._value==2
+            while index != -1:
+                yield first + index
+                index = page_types.find(2, index + 1)
 
     def collect_deprecated_page(self, page: int):
         """Add new deprecated page to GC, smaller first"""
@@ -126,6 +174,7 @@ class FileHandler(object):
         """
         if dep_page in self._cache:  # remove deprecated node in cache
             del self._cache[dep_page]
+        self._dirty_nodes.pop(dep_page, None)
         # when auto_commit closed, WAL won't record uncommitted_pages,
         # so deprecated pages only maintained in memory.
         if self._auto_commit:
@@ -143,15 +192,10 @@ class FileHandler(object):
         File-sync is necessary.
         """
         self._tree_conf = tree_conf
-        length = PAGE_ADDRESS_LIMIT + 1 + PAGE_LENGTH_LIMIT + KEY_LENGTH_LIMIT + VALUE_LENGTH_LIMIT
-        data = (
-                root_page.to_bytes(PAGE_ADDRESS_LIMIT, ENDIAN) +
-                self._tree_conf.order.to_bytes(1, ENDIAN) +
-                self._tree_conf.page_size.to_bytes(PAGE_LENGTH_LIMIT, ENDIAN) +
-                self._tree_conf.key_size.to_bytes(KEY_LENGTH_LIMIT, ENDIAN) +
-                self._tree_conf.value_size.to_bytes(VALUE_LENGTH_LIMIT, ENDIAN) +
-                bytes(self._tree_conf.page_size - length)  # padding
-        )
+        data = bytearray(self._tree_conf.page_size)  # padding comes for free
+        _META_HEADER.pack_into(data, 0, root_page,
+                               (self._tree_conf.order << 8 * PAGE_LENGTH_LIMIT) | self._tree_conf.page_size,
+                               self._tree_conf.key_size, self._tree_conf.value_size)
         self._write_page_data(0, data, f_sync=True)
 
     def get_meta_tree_conf(self) -> tuple:
@@ -162,15 +206,8 @@ class FileHandler(object):
             data = self._read_page_data(0)
         except EndOfFileError:
             raise ValueError('Meta test_tree configure overflow_data has not set yet')
-        root_page = int.from_bytes(data[0:PAGE_ADDRESS_LIMIT], ENDIAN)
-        order_end = PAGE_ADDRESS_LIMIT + 1
-        order = int.from_bytes(data[PAGE_ADDRESS_LIMIT:order_end], ENDIAN)
-        page_size_end = order_end + PAGE_LENGTH_LIMIT
-        page_size = int.from_bytes(data[order_end:page_size_end], ENDIAN)
-        key_size_end = page_size_end + KEY_LENGTH_LIMIT
-        key_size = int.from_bytes(data[page_size_end:key_size_end], ENDIAN)
-        value_size_end = key_size_end + VALUE_LENGTH_LIMIT
-        value_size = int.from_bytes(data[key_size_end:value_size_end], ENDIAN)
+        root_page, order_and_page_size, key_size, value_size = _META_HEADER.unpack_from(data, 0)
+        order, page_size = divmod(order_and_page_size, 1 << 8 * PAGE_LENGTH_LIMIT)
         if order != self._tree_conf.order:
             order = self._tree_conf.order
         self._tree_conf = TreeConf(order, page_size, key_size, value_size)
@@ -183,8 +220,18 @@ class FileHandler(object):
         """
         with self.write_transaction:
             logger.info('Performing checkpoint of {name}'.format(name=self._filename))
+            # pages come in order, consecutive ones are written by one seek and one write.
+            first_page, run = 0, []
+            run_limit = max(1, self.CHECKPOINT_RUN_BYTES // self._tree_conf.page_size)
             for page, page_data in self._wal.checkpoint():
-                self._write_page_data(page, page_data, f_sync=False)
+                if run and (page != first_page + len(run) or len(run) >= run_limit):
+                    self._write_pages_data(first_page, run)
+                    run = []
+                if not run:
+                    first_page = page
+                run.append(page_data)
+            if run:
+                self._write_pages_data(first_page, run)
             file_flush_and_sync(self._fd)
 
             if reopen_wal:
@@ -203,10 +250,29 @@ class FileHandler(object):
     def set_node(self, node: Union[BNode, OverflowNode]):
         """
         Ddd & update node dumped data into db file and also update the cache.
+        Inside a write transaction, node is only marked dirty, it's dumped and written
+        once when the transaction ends, no matter how many times it's set during it.
         """
-        self._wal.set_page(node.page, node.dump())
+        if self._write_depth:
+            self._dirty_nodes[node.page] = node
+        else:
+            with node.dump_view() as page_data:
+                self._wal.set_page(node.page, page_data)
         self._cache[node.page] = node
 
+    def _write_dirty_nodes(self):
+        """Write all dirty nodes into WAL, ordered by page."""
+        while self._dirty_nodes:
+            # dumping may create, update or deprecate overflow nodes, keep every node reachable
+            # by `get_node` until it's written, nodes set again are written in next round.
+            for page in sorted(self._dirty_nodes):
+                node = self._dirty_nodes.get(page)
+                if node is None:  # deprecated in the meantime
+                    continue
+                with node.dump_view() as page_data:
+                    self._wal.set_page(page, page_data)
+                del self._dirty_nodes[page]
+
     def get_node(self, page: int, tree):
         """
         Try to get node from cache to avoid extra IO op, if not exist, read and load from db file.
@@ -214,6 +280,10 @@ class FileHandler(object):
         node = self._cache.get(page)
         if node:
             return node
+        node = self._dirty_nodes.get(page)  # evicted from cache before written
+        if node:
+            self._cache[page] = node
+            return node
 
         data = self._wal.get_page(page)
         if not data:
@@ -224,17 +294,29 @@ class FileHandler(object):
         return node
 
     def ensure_root_block(self, root: BNode):
-        """Sync current root node information with both memory and disk"""
+        """
+        Sync current root node information with both memory and disk.
+        Inside a write transaction, root is recorded once when it ends, however many times it changes.
+        """
         self.set_node(root)
-        self.set_meta_tree_conf(root.page, root.tree_conf)
+        if self._write_depth:
+            self._pending_root = root
+        else:
+            self._commit_root(root)
+
+    def _commit_root(self, root: BNode):
+        """commit pages first, so meta page never points to a root which isn't committed yet"""
         self.commit()
+        self.set_meta_tree_conf(root.page, root.tree_conf)
 
     def commit(self):
         """Sync uncommitted changes with db file"""
+        self._write_dirty_nodes()
         self._wal.commit()
 
     def rollback(self):
         """Rollback all uncommitted pages."""
+        self._dirty_nodes.clear()
         self._wal.rollback()
 
     def flush(self):
@@ -245,7 +327,8 @@ class FileHandler(object):
             nodes = [node for node in self._cache.values()]
             self._cache.clear()
             for node in nodes:
-                self._wal.set_page(node.page, node.dump())
+                with node.dump_view() as page_data:
+                    self._wal.set_page(node.page, page_data)
             self.commit()
             file_flush_and_sync(self._fd)
             self.perform_checkpoint(reopen_wal=True)
@@ -271,9 +354,12 @@ class WAL:
     some emergency happens during transaction. WAL provides an measurement to recover the lost data
     next time user open the same database.
     """
-    __slots__ = ('filename', '_fd', '_page_size', '_committed_pages', '_not_committed_pages', 'needs_recovery')
+    __slots__ = ('filename', '_fd', '_page_size', '_committed_pages', '_not_committed_pages', 'needs_recovery',
+                 '_pending', '_pending_start')
 
-    FRAME_HEADER_LENGTH = FRAME_TYPE_LENGTH_LIMIT + PAGE_ADDRESS_LIMIT
+    FRAME_HEADER_LENGTH = _FRAME_HEADER.size
+    # appended frames are buffered up to this size, then written by one system call.
+    PENDING_LIMIT = 1 << 20
 
     def __init__(self, filename: str, page_size: int):
         self.filename = filename
@@ -281,6 +367,9 @@ class WAL:
         self._page_size = page_size
         self._committed_pages = dict()
         self._not_committed_pages = dict()
+        # frames appended to the end of file but not written yet, starting at file offset `_pending_start`
+        self._pending = bytearray()
+        self._pending_start = 0
 
         self._fd.seek(0, io.SEEK_END)
         if self._fd.tell() == 0:
@@ -297,10 +386,11 @@ class WAL:
         if self._not_committed_pages:
             logger.warning('Closing WAL with uncommitted data, discarding it')
 
+        self._write_pending()
         file_flush_and_sync(self._fd)
 
-        for page, page_start in self._committed_pages.items():
-            page_data = read_from_file(
+        for page, page_start in sorted(self._committed_pages.items()):
+            page_data = pread_from_file(
                 self._fd,
                 page_start,
                 page_start + self._page_size
@@ -339,11 +429,7 @@ class WAL:
         stop = start + self.FRAME_HEADER_LENGTH
         data = read_from_file(self._fd, start, stop)
 
-        frame_type = int.from_bytes(data[0:FRAME_TYPE_LENGTH_LIMIT], ENDIAN)
-        page = int.from_bytes(
-            data[FRAME_TYPE_LENGTH_LIMIT:FRAME_TYPE_LENGTH_LIMIT + PAGE_ADDRESS_LIMIT],
-            ENDIAN
-        )
+        frame_type, page = _FRAME_HEADER.unpack_from(data)
 
         frame_type = FrameType(frame_type)
         if frame_type is FrameType.PAGE:
@@ -372,29 +458,43 @@ class WAL:
             page = 0
         if frame_type is not FrameType.PAGE:
             page_data = b''
-        data = (
-                frame_type.value.to_bytes(FRAME_TYPE_LENGTH_LIMIT, ENDIAN) +
-                page.to_bytes(PAGE_ADDRESS_LIMIT, ENDIAN) +
-                page_data
-        )
+        header = _FRAME_HEADER.pack(frame_type.value, page)
 
         if page in self._committed_pages.keys() and frame_type == FrameType.PAGE:
             # if page has wrote into WAL before, overwrite it, or the size of .wal file will boom.
             page_start = self._committed_pages[page]
             seek_start = page_start - FRAME_TYPE_LENGTH_LIMIT - PAGE_ADDRESS_LIMIT
             self._fd.seek(seek_start)
-        else:
+            write_to_file(self._fd, header + page_data)
+            self._index_frame(frame_type, page, page_start)
+            return
+        # appended frames are buffered, so frames of one transaction go into file by one write
+        # along with its commit frame. uncommitted frames are dropped by recovery anyway.
+        if not self._pending:
             self._fd.seek(0, io.SEEK_END)
-        write_to_file(self._fd, data, f_sync=frame_type != FrameType.PAGE)
-        self._index_frame(frame_type, page, self._fd.tell() - self._page_size)
+            self._pending_start = self._fd.tell()
+        # header and page data are appended to the buffer directly, page data is copied once without a frame buffer.
+        self._pending += header
+        self._pending += page_data
+        self._index_frame(frame_type, page, self._pending_start + len(self._pending) - self._page_size)
+        if frame_type is not FrameType.PAGE:
+            self._write_pending(f_sync=True)
+        elif len(self._pending) >= self.PENDING_LIMIT:
+            self._write_pending()
+
+    def _write_pending(self, f_sync=False):
+        """write buffered frames into file"""
+        if self._pending:
+            self._fd.seek(self._pending_start)
+            write_to_file(self._fd, self._pending, f_sync=f_sync)
+            self._pending = bytearray()
 
     def set_page_deprecated(self, dep_page: int, dep_page_data: bytes):
-        assert dep_page in self._committed_pages.keys(), 'page to be set as deprecated not found.'
-        page_start = self._committed_pages[dep_page]
-        seek_start = page_start - FRAME_TYPE_LENGTH_LIMIT - PAGE_ADDRESS_LIMIT
-        self._fd.seek(seek_start)
-        write_to_file(self._fd, dep_page_data)
-        del self._committed_pages[dep_page]
+        """
+        record the deprecated page as a page frame, so it's committed and written back into db file by
+        checkpoint like other pages, no matter whether the page has been in WAL before.
+        """
+        self.set_page(dep_page, dep_page_data.ljust(self._page_size, b'\x00'))
 
     def get_page(self, page: int) -> bytes:
         for store in (self._not_committed_pages, self._committed_pages):
@@ -405,8 +505,11 @@ class WAL:
         if not page_start:
             return b''
 
-        return read_from_file(self._fd, page_start,
-                              page_start + self._page_size)
+        if page_start >= self._pending_start and self._pending:  # not written yet
+            offset = page_start - self._pending_start
+            return bytes(self._pending[offset:offset + self._page_size])
+        return pread_from_file(self._fd, page_start,
+                               page_start + self._page_size)
 
     def set_page(self, page: int, page_data: bytes):
         self._add_frame(FrameType.PAGE, page, page_data)
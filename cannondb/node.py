@@ -1,184 +1,551 @@
+import bisect
 import enum
 import functools
+import operator
 import struct
-from abc import ABCMeta, abstractmethod
+import sys
 
 from cannondb.constants import *
-from cannondb.serializer import serializer_switcher, type_switcher
+from cannondb.serializer import serializer_info, num_serializer_switcher, num_deserializer_map
 
 
-@functools.total_ordering
-class KeyValPair(metaclass=ABCMeta):
+def _compile(*formats: str) -> struct.Struct:
+    """join several network-order formats into one compiled struct"""
+    return struct.Struct('!' + ''.join(fmt.lstrip('!') for fmt in formats))
+
+
+# header of normal page: node type | pairs length | children length | next page
+_BNODE_HEADER = _compile(NODE_TYPE_FORMAT, NODE_CONTENTS_LENGTH_FORMAT, NODE_CONTENTS_LENGTH_FORMAT,
+                         PAGE_ADDRESS_FORMAT)
+# header of overflow page: node type and overflow data length (3 bytes) share one word | next page
+_OVERFLOW_HEADER = _compile('!I', PAGE_ADDRESS_FORMAT)
+_PAGE_ADDRESS = _compile(PAGE_ADDRESS_FORMAT)
+_NODE_TYPE = _compile(NODE_TYPE_FORMAT)
+
+# `bisect` accepts key function since python 3.10, with a C-level getter the whole search runs in C.
+_KEYED_BISECT = sys.version_info >= (3, 10)
+_pair_key = operator.attrgetter('_key')
+
+
+@functools.lru_cache(maxsize=None)
+def _pair_struct(key_size: int, value_size: int) -> struct.Struct:
+    """
+    compiled layout of a pair: key length | key | key type | value length | value | value type,
+    key and value are zero-padded to their size limitation by struct itself.
+    """
+    return _compile(KEY_LENGTH_FORMAT, '{}s'.format(key_size), SERIALIZER_TYPE_FORMAT,
+                    VALUE_LENGTH_FORMAT, '{}s'.format(value_size), SERIALIZER_TYPE_FORMAT)
+
+
+@functools.lru_cache(maxsize=None)
+def _key_struct(key_size: int) -> struct.Struct:
+    """leading part of pair layout: key length | key | key type, for decoding key only"""
+    return _compile(KEY_LENGTH_FORMAT, '{}s'.format(key_size), SERIALIZER_TYPE_FORMAT)
+
+
+@functools.lru_cache(maxsize=None)
+def _value_struct(value_size: int) -> struct.Struct:
+    """trailing part of pair layout: value length | value | value type, for rewriting value only"""
+    return _compile(VALUE_LENGTH_FORMAT, '{}s'.format(value_size), SERIALIZER_TYPE_FORMAT)
+
+
+@functools.lru_cache(maxsize=None)
+def _key_stride_struct(key_size: int, value_size: int) -> struct.Struct:
+    """pair layout with value part skipped as padding, for decoding keys of consecutive pairs by one pass"""
+    return _compile(KEY_LENGTH_FORMAT, '{}s'.format(key_size), SERIALIZER_TYPE_FORMAT,
+                    '{}x'.format(_value_struct(value_size).size))
+
+
+@functools.lru_cache(maxsize=None)
+def _children_struct(count: int) -> struct.Struct:
+    """layout of children region holding `count` page addresses, packed or unpacked by one call"""
+    return _compile('{}{}'.format(count, PAGE_ADDRESS_FORMAT.lstrip('!')))
+
+
+# value of a loaded pair which hasn't been deserialized yet, its raw bytes are kept in `_val_raw`.
+_UNDECODED = object()
+
+
+def _pack_pairs(tree_conf: TreeConf, pairs, buf: bytearray, offset: int, raw: memoryview = None):
+    """
+    write pairs into buf one after another from offset. packing of a pair is inlined here, so dumping a node
+    costs no method calls and tree conf lookups per pair.
+    :param raw: raw data of pairs not deserialized yet, they're given as int offsets in `pairs`
+    """
+    key_size, value_size = tree_conf.key_size, tree_conf.value_size
+    layout = _pair_struct(key_size, value_size)
+    pack_into, pair_len = layout.pack_into, layout.size
+    for pair in pairs:
+        if type(pair) is int:
+            buf[offset:offset + pair_len] = raw[pair:pair + pair_len]
+        elif pair._dumped is not None:
+            buf[offset:offset + pair_len] = pair._dumped
+        else:
+            key_as_bytes = pair.key_ser.serialize(pair._key)
+            val_as_bytes = pair._val_raw if pair._value is _UNDECODED else pair.val_ser.serialize(pair._value)
+            if len(key_as_bytes) > key_size or len(val_as_bytes) > value_size:
+                raise ValueError('Size of key or value exceeds the limitation')
+            pack_into(buf, offset, len(key_as_bytes), key_as_bytes, pair._key_type, len(val_as_bytes), val_as_bytes,
+                      pair._val_type)
+        offset += pair_len
+
+
+class KeyValPair(object):
     """
     Unit stores a pair of key-value, switch its serializer automatically by its type.
     """
-    __slots__ = ('_key', '_value', 'length', 'tree_conf', 'key_ser', 'val_ser', '_dumped')
+    __slots__ = ('_key', '_value', 'tree_conf', 'key_ser', 'val_ser', '_key_type', '_val_type', '_layout',
+                 '_dumped', '_val_raw')
 
-    def __init__(self, tree_conf: TreeConf, key=None, value=None, data: bytes = None):
+    def __init__(self, tree_conf: TreeConf, key=None, value=None, data: bytes = None, fields: tuple = None):
+        """
+        :param data: raw dumped data of pair
+        :param fields: raw data already unpacked by pair layout, used when pairs are unpacked in bulk
+        """
         self.tree_conf = tree_conf
+        self._layout = _pair_struct(tree_conf.key_size, tree_conf.value_size)  # compiled once per tree conf
         self._key = key
         self._value = value
-        self.length = (KEY_LENGTH_LIMIT + self.tree_conf.key_size +
-                       VALUE_LENGTH_LIMIT + self.tree_conf.value_size +
-                       2 * SERIALIZER_TYPE_LENGTH_LIMIT)
-        if self._key is not None and self._value is not None:
-            self.key_ser = serializer_switcher(type(key))
-            self.val_ser = serializer_switcher(type(value))
-        if data:
+        self._val_raw = None
+        self._key_type = self._val_type = None  # type numbers, cached for dumping
+        if fields is not None:  # the way pairs are loaded from pages
+            self._load_fields(fields)
+        elif data:
             self.load(data)
+        elif self._key is not None and self._value is not None:
+            self.key_ser, self._key_type = serializer_info(type(key))
+            self.val_ser, self._val_type = serializer_info(type(value))
         self._dumped = None
 
-    def load(self, data: bytes):
-        assert len(data) == self.length
-        key_len_end = KEY_LENGTH_LIMIT
-        key_len = struct.unpack(KEY_LENGTH_FORMAT, data[0:key_len_end])[0]
-
-        assert 0 <= key_len <= self.tree_conf.key_size
-
-        key_end = key_len_end + key_len
-        key_type_start = key_len_end + self.tree_conf.key_size
-        key_type_end = key_type_start + SERIALIZER_TYPE_LENGTH_LIMIT
-        self.key_ser = serializer_switcher(type_switcher(int.from_bytes(data[key_type_start:key_type_end], ENDIAN)))
-        self._key = self.key_ser.deserialize(data[key_len_end:key_end])
-
-        val_len_end = key_type_end + VALUE_LENGTH_LIMIT
-        val_len = struct.unpack(VALUE_LENGTH_FORMAT, data[key_type_end:val_len_end])[0]
+    @classmethod
+    def _from_fields(cls, tree_conf: TreeConf, layout: struct.Struct, fields: tuple):
+        """pair loaded from fields unpacked by layout, `__init__` is skipped and only slots read by load are set"""
+        pair = cls.__new__(cls)
+        pair.tree_conf, pair._layout, pair._dumped = tree_conf, layout, None
+        pair._load_fields(fields)
+        return pair
 
-        assert 0 <= val_len <= self.tree_conf.value_size
+    @property
+    def length(self) -> int:
+        """length of dumped pair, it's decided by tree conf only"""
+        return self._layout.size
 
-        val_end = val_len_end + val_len
-        val_type_start = val_len_end + self.tree_conf.value_size
-        val_type_end = val_type_start + SERIALIZER_TYPE_LENGTH_LIMIT
-        self.val_ser = serializer_switcher(type_switcher(int.from_bytes(data[val_type_start:val_type_end], ENDIAN)))
-        self._value = self.val_ser.deserialize(data[val_len_end:val_end])
+    def load(self, data: bytes):
+        assert len(data) == self._layout.size
+        self._load_fields(self._layout.unpack_from(data))
+
+    def _load_fields(self, fields: tuple):
+        # lengths are unsigned and bounded by key/value size when pairs are packed, not checked again per pair.
+        key_len, key_as_bytes, key_type, val_len, val_as_bytes, val_type = fields
+        self.key_ser, self._key_type = num_serializer_switcher(key_type), key_type
+        self._key = self.key_ser.deserialize(key_as_bytes[:key_len])
+        self.val_ser, self._val_type = num_serializer_switcher(val_type), val_type
+        # value is decoded on first access, a search only wants keys and one value at most.
+        self._value, self._val_raw = _UNDECODED, val_as_bytes[:val_len]
 
     def _dump(self):
-        key_as_bytes = self.key_ser.serialize(self._key)
-        key_len = len(key_as_bytes)
-        key_type_as_bytes = type_switcher(type(self._key)).to_bytes(SERIALIZER_TYPE_LENGTH_LIMIT, ENDIAN)
-        val_as_bytes = self.val_ser.serialize(self._value)
-        val_len = len(val_as_bytes)
-        val_type_as_bytes = type_switcher(type(self._value)).to_bytes(SERIALIZER_TYPE_LENGTH_LIMIT, ENDIAN)
-        data = (
-                struct.pack(KEY_LENGTH_FORMAT, key_len) +
-                key_as_bytes +
-                bytes(self.tree_conf.key_size - key_len) +
-                key_type_as_bytes +
-                struct.pack(VALUE_LENGTH_FORMAT, val_len) +
-                val_as_bytes +
-                bytes(self.tree_conf.value_size - val_len) +
-                val_type_as_bytes
-        )
-        self._dumped = bytearray(data)
+        data = bytearray(self._layout.size)
+        _pack_pairs(self.tree_conf, (self,), data, 0)
+        self._dumped = data
+
+    def dump_into(self, buf: bytearray, offset: int):
+        """
+        write dumped data into buf at offset, copy from dump cache if there is one,
+        else pack it straight into buf without allocating a buffer for this pair.
+        """
+        _pack_pairs(self.tree_conf, (self,), buf, offset)
 
     def dump(self) -> bytes:
         # assert self._key is not None and self._value is not None
-        if self._dumped:
-            return bytes(self._dumped)
-        self._dump()
+        if self._dumped is None:
+            self._dump()
         return bytes(self._dumped)
 
+    def dump_view(self) -> memoryview:
+        """zero-copy view of dumped data"""
+        if self._dumped is None:
+            self._dump()
+        return memoryview(self._dumped)
+
     @property
     def key(self):
         return self._key
 
     @key.setter
     def key(self, new_key):
+        if type(new_key) is not type(self._key):  # switch serializer only when type changed
+            self.key_ser, self._key_type = serializer_info(type(new_key))
         self._key = new_key
-        if self._dumped:
+        if self._dumped is not None:
             key_as_bytes = self.key_ser.serialize(self._key)
             key_len = len(key_as_bytes)
-            key_as_bytes += bytes(self.tree_conf.key_size - key_len)
-            self._dumped[0:KEY_LENGTH_LIMIT] = struct.pack(KEY_LENGTH_FORMAT, key_len)
-            self._dumped[KEY_LENGTH_LIMIT:KEY_LENGTH_LIMIT + self.tree_conf.key_size] = key_as_bytes
+            if key_len > self.tree_conf.key_size:
+                raise ValueError('Size of key exceeds the limitation')
+            # rewrite key part of dumped data by one call, struct zero-pads the key itself.
+            _key_struct(self.tree_conf.key_size).pack_into(self._dumped, 0, key_len, key_as_bytes, self._key_type)
 
     @property
     def value(self):
+        if self._value is _UNDECODED:
+            self._value, self._val_raw = self.val_ser.deserialize(self._val_raw), None
         return self._value
 
     @value.setter
     def value(self, new_val):
-        self._value = new_val
-        if self._dumped:
+        # switch serializer only when type changed, a value not decoded yet isn't decoded just for this.
+        if self._value is _UNDECODED or type(new_val) is not type(self._value):
+            self.val_ser, self._val_type = serializer_info(type(new_val))
+        self._value, self._val_raw = new_val, None
+        if self._dumped is not None:
             val_as_bytes = self.val_ser.serialize(self._value)
             val_len = len(val_as_bytes)
-            val_as_bytes += bytes(self.tree_conf.value_size - val_len)
-            val_len_start = KEY_LENGTH_LIMIT + self.tree_conf.key_size + SERIALIZER_TYPE_LENGTH_LIMIT
-            self._dumped[val_len_start:val_len_start + VALUE_LENGTH_LIMIT] = struct.pack(VALUE_LENGTH_FORMAT, val_len)
-            val_start = val_len_start + VALUE_LENGTH_LIMIT
-            self._dumped[val_start:val_start + self.tree_conf.value_size] = val_as_bytes
-
+            if val_len > self.tree_conf.value_size:
+                raise ValueError('Size of value exceeds the limitation')
+            # value part starts right behind key part of the layout
+            _value_struct(self.tree_conf.value_size).pack_into(self._dumped, _key_struct(self.tree_conf.key_size).size,
+                                                               val_len, val_as_bytes, self._val_type)
+
+    # pairs are ordered by key, compared with another pair or with a bare key directly.
+    # all of them are spelled out, they are the innermost ops of every search in tree.
     def __eq__(self, other):
         if isinstance(other, KeyValPair):
-            return self._key == other._key and self._value == self._value
+            return self._key == other._key and self.value == other.value
         return self._key == other
 
+    def __ne__(self, other):
+        if isinstance(other, KeyValPair):
+            return self._key != other._key or self.value != other.value
+        return self._key != other
+
     def __lt__(self, other):
-        return self._key < other
+        return self._key < (other._key if isinstance(other, KeyValPair) else other)
+
+    def __le__(self, other):
+        return self._key <= (other._key if isinstance(other, KeyValPair) else other)
+
+    def __gt__(self, other):
+        return self._key > (other._key if isinstance(other, KeyValPair) else other)
+
+    def __ge__(self, other):
+        return self._key >= (other._key if isinstance(other, KeyValPair) else other)
 
     def __str__(self):
-        return '<{key}:{val}>'.format(key=self._key, val=self._value)
+        return '<{key}:{val}>'.format(key=self._key, val=self.value)
 
     __repr__ = __str__
 
 
+class LazyPairList(object):
+    """
+    List of pairs loaded from raw page data. Slots not accessed yet keep the offset of pair in raw
+    data, a pair is deserialized only when it's accessed at the first time, because most operations
+    on a loaded node only touch few of its pairs.
+    Searching inside node decodes keys only, they're kept apart from pairs (indexed by offset).
+    A list searched again and again (branches near root mostly) decodes all its keys into a key column
+    kept in step with pairs, then it's searched by C-level bisect.
+    """
+    __slots__ = ('_tree_conf', '_raw', '_layout', '_pair_len', '_key_layout', '_val_layout', '_val_start', '_items',
+                 '_keys', '_key_list', '_searches')
+
+    # searches taken by probing keys one by one before building key column, decoding all keys
+    # costs about as much as this number of searches on a full node.
+    KEY_LIST_SEARCHES = 8
+
+    def __init__(self, tree_conf: TreeConf, raw: memoryview, items: list, keys: dict = None, searches: int = 0):
+        """
+        :param searches: searches taken already, list builds key column on `KEY_LIST_SEARCHES`th search
+        """
+        self._tree_conf = tree_conf
+        self._raw = raw
+        self._layout = _pair_struct(tree_conf.key_size, tree_conf.value_size)
+        self._pair_len = self._layout.size
+        # key and value parts of pair layout and where value part starts, fixed by tree conf.
+        self._key_layout = _key_struct(tree_conf.key_size)
+        self._val_layout = _value_struct(tree_conf.value_size)
+        self._val_start = self._key_layout.size
+        self._items = items
+        self._keys = {} if keys is None else keys  # offset -> key decoded from raw data
+        self._key_list = None  # key of every pair in order, built once list is searched frequently
+        self._searches = searches
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return LazyPairList(self._tree_conf, self._raw, self._items[index], self._keys)
+        item = self._items[index]
+        if type(item) is int:  # not deserialized yet, unpacked at its offset without slicing raw data
+            item = self._items[index] = KeyValPair._from_fields(self._tree_conf, self._layout,
+                                                                self._layout.unpack_from(self._raw, item))
+        return item
+
+    def __setitem__(self, index, pair):
+        self._items[index] = pair
+        if self._key_list is not None:
+            self._key_list[index] = [it.key for it in pair] if isinstance(index, slice) else pair.key
+
+    def __delitem__(self, index):
+        del self._items[index]
+        if self._key_list is not None:
+            del self._key_list[index]
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        self._materialize()
+        return iter(self._items)
+
+    def _run_end(self, index: int) -> int:
+        """end of the run of pairs not accessed yet from index, which lie next to each other in raw data"""
+        items, pair_len = self._items, self._pair_len
+        end, n = index + 1, len(items)
+        while end < n and type(items[end]) is int and items[end] == items[end - 1] + pair_len:
+            end += 1
+        return end
+
+    def _materialize(self):
+        """
+        deserialize all pairs not accessed yet, pairs lying next to each other in raw data
+        are unpacked by one iter_unpack pass.
+        """
+        items, pair_len, layout = self._items, self._pair_len, self._layout
+        index, n = 0, len(items)
+        while index < n:
+            if type(items[index]) is not int:
+                index += 1
+                continue
+            end = self._run_end(index)
+            start = items[index]
+            for i, fields in enumerate(layout.iter_unpack(self._raw[start:start + (end - index) * pair_len]), index):
+                items[i] = KeyValPair._from_fields(self._tree_conf, layout, fields)
+            index = end
+
+    def iter_items(self, start: int = 0):
+        """
+        yield key and value of pairs from index start in order. pairs not accessed yet are decoded straight from
+        raw data by one iter_unpack pass per run, without building pairs for them, a scan reads every pair only once.
+        """
+        items, pair_len = self._items, self._pair_len
+        index, n = start, len(items)
+        while index < n:
+            item = items[index]
+            if type(item) is not int:
+                yield item.key, item.value
+                index += 1
+                continue
+            end = self._run_end(index)
+            for key_len, key_as_bytes, key_type, val_len, val_as_bytes, val_type in self._layout.iter_unpack(
+                    self._raw[item:item + (end - index) * pair_len]):
+                yield (num_deserializer_map[key_type](key_as_bytes[:key_len]),
+                       num_deserializer_map[val_type](val_as_bytes[:val_len]))
+            index = end
+
+    def iter_keys(self, start: int = 0):
+        """yield keys of pairs from index start in order, values are stepped over without being decoded"""
+        if self._key_list is not None:
+            yield from self._key_list[start:] if start else self._key_list
+            return
+        items, pair_len = self._items, self._pair_len
+        key_stride = _key_stride_struct(self._tree_conf.key_size, self._tree_conf.value_size)
+        index, n = start, len(items)
+        while index < n:
+            item = items[index]
+            if type(item) is not int:
+                yield item.key
+                index += 1
+                continue
+            end = self._run_end(index)
+            for key_len, key_as_bytes, key_type in key_stride.iter_unpack(
+                    self._raw[item:item + (end - index) * pair_len]):
+                yield num_deserializer_map[key_type](key_as_bytes[:key_len])
+            index = end
+
+    def insert(self, index: int, pair: KeyValPair):
+        self._items.insert(index, pair)
+        if self._key_list is not None:
+            self._key_list.insert(index, pair.key)
+
+    def append(self, pair: KeyValPair):
+        self._items.append(pair)
+        if self._key_list is not None:
+            self._key_list.append(pair.key)
+
+    def extend(self, pairs):
+        pairs = list(pairs)
+        self._items.extend(pairs)
+        if self._key_list is not None:
+            self._key_list.extend(pair.key for pair in pairs)
+
+    def pop(self, index: int = -1) -> KeyValPair:
+        pair = self[index]
+        del self[index]
+        return pair
+
+    def dump_into(self, buf: bytearray, offset: int):
+        """write all pairs into buf from offset, pairs not deserialized yet are copied from raw data"""
+        _pack_pairs(self._tree_conf, self._items, buf, offset, self._raw)
+
+    def build_key_list(self):
+        """
+        decode keys of all pairs into key column. pairs of a freshly loaded list lie next to each other
+        in raw data, keys of them are unpacked by one iter_unpack pass stepping over values.
+        """
+        items = self._items
+        if items and type(items[0]) is int and self._run_end(0) == len(items):
+            key_stride = _key_stride_struct(self._tree_conf.key_size, self._tree_conf.value_size)
+            self._key_list = [num_deserializer_map[key_type](key_as_bytes[:key_len])
+                              for key_len, key_as_bytes, key_type in key_stride.iter_unpack(
+                                  self._raw[items[0]:items[0] + len(items) * self._pair_len])]
+        else:
+            self._key_list = [self.key_at(index) for index in range(len(items))]
+
+    def key_at(self, index: int):
+        """key of pair at index, pair not accessed yet only gets its key decoded"""
+        if self._key_list is not None:
+            return self._key_list[index]
+        item = self._items[index]
+        if type(item) is not int:
+            return item.key
+        try:
+            return self._keys[item]
+        except KeyError:
+            key_len, key_as_bytes, key_type = self._key_layout.unpack_from(self._raw, item)
+            key = self._keys[item] = num_deserializer_map[key_type](key_as_bytes[:key_len])
+            return key
+
+    def value_at(self, index: int):
+        """value of pair at index, pair not accessed yet only gets its value decoded without building the pair"""
+        item = self._items[index]
+        if type(item) is not int:
+            return item.value
+        val_len, val_as_bytes, val_type = self._val_layout.unpack_from(self._raw, item + self._val_start)
+        return num_deserializer_map[val_type](val_as_bytes[:val_len])
+
+    def bisect_left(self, key) -> int:
+        """same as `bisect.bisect_left` over pairs, but compares decoded keys only"""
+        if self._key_list is not None:
+            return bisect.bisect_left(self._key_list, key)
+        self._searches += 1
+        if self._searches >= self.KEY_LIST_SEARCHES:
+            self.build_key_list()
+            return bisect.bisect_left(self._key_list, key)
+        items = self._items
+        lo, hi = 0, len(items)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            item = items[mid]
+            if (self.key_at(mid) if type(item) is int else item._key) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def find(self, key) -> tuple:
+        """index as `bisect_left` gives, and whether key is at that index"""
+        key_list = self._key_list
+        if key_list is not None:  # most searches once a node is hot, bisect it here without another call
+            index = bisect.bisect_left(key_list, key)
+            return index, index < len(key_list) and key_list[index] == key
+        index = self.bisect_left(key)
+        if index == len(self._items):
+            return index, False
+        key_list = self._key_list
+        # key at the index was decoded by the search already, it's looked up rather than decoded again.
+        return index, (key_list[index] if key_list is not None else self.key_at(index)) == key
+
+    def materialized(self) -> list:
+        """pairs which have been deserialized"""
+        return [it for it in self._items if type(it) is not int]
+
+    def __repr__(self):
+        return repr(list(self))
+
+
 class _PageType(enum.Enum):
     NORMAL_PAGE = 0
     OVERFLOW_PAGE = 1
     DEPRECATED_PAGE = 2
 
 
-class BaseBNode(metaclass=ABCMeta):
+class BaseBNode(object):
+    """
+    Base of nodes stored in pages. It's a plain class rather than an abstract one, `ABCMeta` makes
+    every `isinstance` check against node classes slower, subclasses must override load, dump and dump_view.
+    """
     PAGE_TYPE = None
+    PAGE_TYPE_VALUE = None  # `PAGE_TYPE.value` as a plain int, read whenever a page is packed or checked
+
+    @property
+    def next_page(self):
+        """page of the next overflow node, None if no overflow"""
+        return self._next_page or None
+
+    @next_page.setter
+    def next_page(self, page: int):
+        # kept as int internally, 0 means no overflow page, the same as it's packed in header.
+        self._next_page = page or 0
 
-    @abstractmethod
     def load(self, data: bytes):
-        """create node from raw overflow_data"""
-        pass
+        """
+        create node from raw overflow_data, data can also be a memoryview,
+        it's shared by node without copying so it must not be modified afterwards.
+        """
+        raise NotImplementedError
 
-    @abstractmethod
     def dump(self) -> bytes:
         """convert node to bytes which contains all information of this node"""
-        pass
+        raise NotImplementedError
+
+    def dump_view(self) -> memoryview:
+        """
+        zero-copy view of dumped data, use it when data is consumed at once (e.g. written into file),
+        and release it before the node changes again.
+        """
+        raise NotImplementedError
 
     @classmethod
     def from_raw_data(cls, tree, tree_conf: TreeConf, page: int, data: bytes):
         """construct node from raw data, corresponding to it's node type"""
         # assert len(data) == tree_conf.page_size
-        node_type = int.from_bytes(data[0:NODE_TYPE_LENGTH_LIMIT], ENDIAN)
-        if node_type == 0:
-            return BNode(tree, tree_conf, page=page, data=data)
-        elif node_type == 1:
-            return OverflowNode(tree, tree_conf, page=page, data=data)
-        elif node_type == 2:
-            raise TypeError('Deprecated pages can only be used by pages-GC.')
-        else:
+        node_type = data[0]  # node type takes exactly one byte
+        try:
+            node_cls = _NODE_CLASSES[node_type]
+        except IndexError:
             raise TypeError('No such node type:{type} matched'.format(type=node_type))
+        if node_cls is None:
+            raise TypeError('Deprecated pages can only be used by pages-GC.')
+        return node_cls(tree, tree_conf, page=page, data=data)
 
-    def _create_or_update_overflow(self, data: bytes, header_len: int) -> bytes:
+    def _create_or_update_overflow(self, data: bytes, header_len: int, head=None) -> int:
         """
-        if has created overflow page before, update it, else create new
-        :return: cropped origin-data
+        move data behind this page into overflow page, if has created overflow page before, update it,
+        else create new. data itself is left as it is, caller crops it to the returned length.
+        :param head: overflow node at `_next_page` if caller has fetched it already
+        :return: length of data kept in this page
         """
         detach_start = self.tree_conf.page_size - header_len
-        if self.next_page:
+        if self._next_page:
             # has created overflow page, update it.
-            of = self.tree.handler.get_node(self.next_page, tree=self.tree)
+            of = head or self.tree.handler.get_node(self._next_page, tree=self.tree)
         else:
             # create new overflow page
-            self.next_page = self.tree.next_available_page
-            of = OverflowNode(tree=self.tree, tree_conf=self.tree_conf, page=self.next_page, parent_page=self.page)
-        of.update_overflow_data(data[detach_start:])
+            self._next_page = self.tree.next_available_page
+            of = OverflowNode(tree=self.tree, tree_conf=self.tree_conf, page=self._next_page, parent_page=self.page)
+        tail = memoryview(data)[detach_start:]
+        if not tail.readonly:  # caller may edit data later, overflow page takes a copy of it
+            tail = tail.tobytes()
+        # immutable data is only sliced, pages down the chain share it without copying again.
+        of.update_overflow_data(tail)
         of.flush()
-        return data[0:detach_start]
+        return detach_start
 
 
 class OverflowNode(BaseBNode):
     """
     Recording overflow pages' information and raw overflow_data
     """
-    __slots__ = ('tree', 'tree_conf', 'page', 'parent_page', 'next_page', 'overflow_data', '_dumped')
+    __slots__ = ('tree', 'tree_conf', 'page', 'parent_page', '_next_page', 'overflow_data', '_dumped', '_dirty')
     PAGE_TYPE = _PageType.OVERFLOW_PAGE
+    PAGE_TYPE_VALUE = _PageType.OVERFLOW_PAGE.value
 
     def __init__(self, tree, tree_conf: TreeConf, page: int, parent_page: int = None, next_page: int = None,
                  data: bytes = None):
@@ -188,48 +555,45 @@ class OverflowNode(BaseBNode):
         self.parent_page = parent_page
         self.next_page = next_page
         self.overflow_data = None
+        self._dumped = None  # internal dump cache. Re-dump every time is extremely expensive.
+        self._dirty = True  # whether dumped data is out of sync with node
         if data:
             self.load(data)
-        self._dumped = None  # internal dump cache. Re-dump every time is extremely expensive.
 
     def load(self, data: bytes):
         # assert len(data) == self.tree_conf.page_size
-        node_type = int.from_bytes(data[0:NODE_TYPE_LENGTH_LIMIT], ENDIAN)
-        assert node_type == self.PAGE_TYPE.value
-        data_len_end = NODE_TYPE_LENGTH_LIMIT + PAGE_LENGTH_LIMIT
-        data_len = int.from_bytes(data[NODE_TYPE_LENGTH_LIMIT:data_len_end], ENDIAN)
-        header_end = data_len_end + PAGE_ADDRESS_LIMIT
-        self.next_page = int.from_bytes(data[data_len_end:header_end], ENDIAN)
-        if self.next_page == 0:
-            self.next_page = None
-        self.overflow_data = data[header_end:header_end + data_len]
+        type_and_len, self._next_page = _OVERFLOW_HEADER.unpack_from(data, 0)
+        node_type, data_len = divmod(type_and_len, 1 << 8 * PAGE_LENGTH_LIMIT)
+        assert node_type == self.PAGE_TYPE_VALUE
+        header_end = _OVERFLOW_HEADER.size
+        self.overflow_data = memoryview(data)[header_end:header_end + data_len]  # zero-copy slice of page
+        self._dumped, self._dirty = data, False  # page data is exactly the dumped data, rebuilt on update
 
-    def dump(self) -> bytes:
-        if self._dumped:
-            return bytes(self._dumped)
-        data = bytearray()
+    def _dump(self):
         header_len = NODE_TYPE_LENGTH_LIMIT + PAGE_LENGTH_LIMIT + PAGE_ADDRESS_LIMIT
         if len(self.overflow_data) + header_len > self.tree_conf.page_size:  # overflow
-            self.overflow_data = self._create_or_update_overflow(self.overflow_data, header_len)
-            assert len(self.overflow_data) == self.tree_conf.page_size - header_len
-        elif len(self.overflow_data) + header_len <= self.tree_conf.page_size and self.next_page:
-            # overflow before, but normal currently
-            self.tree.handler.get_node(self.next_page, tree=self.tree).set_as_deprecated()
-            self.next_page = None
-        data.extend(self.overflow_data)
-        next_page = 0 if self.next_page is None else self.next_page
-        header = (
-                self.PAGE_TYPE.value.to_bytes(NODE_TYPE_LENGTH_LIMIT, ENDIAN) +
-                len(self.overflow_data).to_bytes(PAGE_LENGTH_LIMIT, ENDIAN) +
-                next_page.to_bytes(PAGE_ADDRESS_LIMIT, ENDIAN)
-        )
-        data = bytearray(header) + data
-        if len(data) < self.tree_conf.page_size:
-            padding = bytearray(self.tree_conf.page_size - len(data))
-            data.extend(padding)
-        self._dumped = data
+            kept = self._create_or_update_overflow(self.overflow_data, header_len)
+            self.overflow_data = memoryview(self.overflow_data)[:kept]
+        elif self._next_page:
+            # overflow before, but normal currently. chain is dropped once, later dumps find no next page.
+            self.tree.handler.get_node(self._next_page, tree=self.tree).set_as_deprecated()
+            self._next_page = 0
+        data = bytearray(self.tree_conf.page_size)
+        _OVERFLOW_HEADER.pack_into(data, 0, (self.PAGE_TYPE_VALUE << 8 * PAGE_LENGTH_LIMIT) | len(self.overflow_data),
+                                   self._next_page)
+        data[header_len:header_len + len(self.overflow_data)] = self.overflow_data
+        self._dumped, self._dirty = data, False
+
+    def dump(self) -> bytes:
+        if self._dirty:
+            self._dump()
         return bytes(self._dumped)
 
+    def dump_view(self) -> memoryview:
+        if self._dirty:
+            self._dump()
+        return memoryview(self._dumped)
+
     def flush(self):
         """
         write overflow overflow_data into file
@@ -242,72 +606,87 @@ class OverflowNode(BaseBNode):
         to avoid re-dump next time. Dump is time-consuming.
         """
         self.overflow_data = new_overflow
-        if self._dumped:  # sync-updating dumped data
+        if not self._dirty:  # sync-updating dumped data
             header_len = NODE_TYPE_LENGTH_LIMIT + PAGE_LENGTH_LIMIT + PAGE_ADDRESS_LIMIT
             if len(self.overflow_data) + header_len > self.tree_conf.page_size:  # overflow
-                self.overflow_data = self._create_or_update_overflow(self.overflow_data, header_len)
-                assert len(self.overflow_data) == self.tree_conf.page_size - header_len
-            elif len(self.overflow_data) + header_len <= self.tree_conf.page_size and self.next_page:
+                kept = self._create_or_update_overflow(self.overflow_data, header_len)
+                self.overflow_data = memoryview(self.overflow_data)[:kept]
+            elif self._next_page:
                 # overflow before, but normal currently
-                self.tree.handler.get_node(self.next_page, tree=self.tree).set_as_deprecated()
-                self.next_page = None
-            of_len_start = NODE_TYPE_LENGTH_LIMIT
-            of_len_end = of_len_start + PAGE_LENGTH_LIMIT
-            self._dumped[of_len_start:of_len_end] = len(self.overflow_data).to_bytes(PAGE_LENGTH_LIMIT, ENDIAN)
-            next_page = 0 if self.next_page is None else self.next_page
-            self._dumped[of_len_end:header_len] = next_page.to_bytes(PAGE_ADDRESS_LIMIT, ENDIAN)
-            self._dumped[header_len:] = self.overflow_data
-            if len(self._dumped) < self.tree_conf.page_size:
-                padding = bytearray(self.tree_conf.page_size - len(self._dumped))
-                self._dumped.extend(padding)
-            assert len(self._dumped) == self.tree_conf.page_size
+                self.tree.handler.get_node(self._next_page, tree=self.tree).set_as_deprecated()
+                self._next_page = 0
+            # fresh zeroed page, write header and data into its prefix, padding comes for free.
+            page = bytearray(self.tree_conf.page_size)
+            _OVERFLOW_HEADER.pack_into(page, 0,
+                                       (self.PAGE_TYPE_VALUE << 8 * PAGE_LENGTH_LIMIT) | len(self.overflow_data),
+                                       self._next_page)
+            page[header_len:header_len + len(self.overflow_data)] = self.overflow_data
+            self._dumped = page
+
+    def chain_data(self) -> list:
+        """
+        overflow data of this page and all pages behind it in chain, in order. Parent joins them
+        with its own data by one copy, rather than merging them here first.
+        """
+        parts = [self.overflow_data]
+        node = self
+        while node._next_page:
+            node = self.tree.handler.get_node(node._next_page, tree=self.tree)
+            # assert isinstance(node, OverflowNode)
+            parts.append(node.overflow_data)
+        return parts
 
     def get_complete_data(self) -> bytes:
         """
         There may more than one overflow page, merge all overflow data and return it to parent,
         [BNode or OverflowNode]
         """
-        if self.next_page:
-            next_overflow = self.tree.handler.get_node(self.next_page, tree=self.tree)
-            # assert isinstance(next_overflow, OverflowNode)
-            return self.overflow_data + next_overflow.get_complete_data()
-        else:
-            return self.overflow_data
+        return b''.join(self.chain_data())
 
     def set_as_deprecated(self):
         """
         length of overflow data is now under page size, set pages after this in overflow-pages-chain
         as deprecated.
         """
-        new_type_as_bytes = _PageType.DEPRECATED_PAGE.value.to_bytes(NODE_TYPE_LENGTH_LIMIT, ENDIAN)
-        if self.next_page:
-            self.tree.handler.get_node(self.next_page, tree=self.tree).set_as_deprecated()
-            self.next_page = None
-        self.tree.handler.set_deprecated_data(self.page, new_type_as_bytes)
-        self.tree.handler.collect_deprecated_page(self.page)
+        new_type_as_bytes = _NODE_TYPE.pack(_PageType.DEPRECATED_PAGE.value)
+        handler = self.tree.handler
+        node = self
+        while True:  # walk down the chain instead of recursing, every page is fetched once
+            next_page, node._next_page = node._next_page, 0
+            handler.set_deprecated_data(node.page, new_type_as_bytes)
+            handler.collect_deprecated_page(node.page)
+            if not next_page:
+                break
+            node = handler.get_node(next_page, tree=self.tree)
 
 
 class BNode(BaseBNode):
-    __slots__ = ('tree', 'contents', 'children', 'tree_conf', 'page', 'next_page', 'overflow_data')
+    __slots__ = ('tree', 'contents', 'children', 'tree_conf', 'page', '_next_page', 'overflow_data', '_dumped',
+                 '_dirty')
     PAGE_TYPE = _PageType.NORMAL_PAGE
+    PAGE_TYPE_VALUE = _PageType.NORMAL_PAGE.value
 
     def __init__(self, tree, tree_conf: TreeConf, contents: list = None, children: list = None, page: int = None,
                  next_page: int = None, data: bytes = None):
         self.tree = tree
         self.tree_conf = tree_conf
-        self.contents = contents or []
-        self.children = children or []
         self.page = page or self.tree.next_available_page
-        self.next_page = next_page
         if data:
+            # contents, children, next page and dump-cache all come from page data,
+            # don't allocate defaults only to be replaced.
             self.load(data)
-        self._dumped = None  # internal dump-cache. Re-dump every time is extremely expensive.
+        else:
+            self.contents = contents or []
+            self.children = children or []
+            self.next_page = next_page
+            self._dumped = None  # internal dump-cache. Re-dump every time is extremely expensive.
+            self._dirty = True  # whether dumped data is out of sync with node
         if self.children:
             assert len(self.contents) + 1 == len(self.children), \
                 'One more child than overflow_data item required'
 
     def __repr__(self):
-        name = 'Branch' if getattr(self, 'children', None) else 'Leaf'
+        name = 'Branch' if self.children else 'Leaf'
         return '<{name} [pairs= {pairs}] [children= {children}]>'.format(
             name=name, pairs=','.join([str(it) for it in self.contents]),
             children=','.join([str(ch) for ch in self.children]))
@@ -316,322 +695,409 @@ class BNode(BaseBNode):
 
     def load(self, data: bytes):
         assert len(data) == self.tree_conf.page_size
-        pairs_len_end = NODE_TYPE_LENGTH_LIMIT + NODE_CONTENTS_LENGTH_LIMIT
-        pairs_len = int.from_bytes(data[NODE_TYPE_LENGTH_LIMIT:pairs_len_end], ENDIAN)
-        children_len_end = pairs_len_end + NODE_CONTENTS_LENGTH_LIMIT
-        children_len = int.from_bytes(data[pairs_len_end:children_len_end], ENDIAN)
-        header_end = children_len_end + PAGE_ADDRESS_LIMIT
-        self.next_page = int.from_bytes(data[children_len_end:header_end], ENDIAN)
-        if self.next_page == 0:
-            self.next_page = None
-        else:
-            overflow_node = self.tree.handler.get_node(self.next_page, tree=self.tree)
-            # assert isinstance(overflow_node, OverflowNode)
-            data += overflow_node.get_complete_data()
-        each_pair_len = KeyValPair(self.tree_conf).length
+        # page data is exactly the dumped data, share it and copy only when it's patched.
+        self._dumped, self._dirty = data, False
+        _, pairs_len, children_len, self._next_page = _BNODE_HEADER.unpack_from(data, 0)
+        header_end = _BNODE_HEADER.size
         pairs_end = header_end + pairs_len
-        for off_set in range(header_end, pairs_end, each_pair_len):
-            pair = KeyValPair(self.tree_conf, data=data[off_set:(off_set + each_pair_len)])
-            self.contents.append(pair)
-        children_end = pairs_end + children_len
-        assert children_end <= len(data)
-        for off_set in range(pairs_end, children_end, PAGE_ADDRESS_LIMIT):
-            self.children.append(int.from_bytes(data[off_set:(off_set + PAGE_ADDRESS_LIMIT)], ENDIAN))
+        children_data = memoryview(data)[pairs_end:pairs_end + children_len]
+        if self._next_page:
+            overflow_node = self.tree.handler.get_node(self._next_page, tree=self.tree)
+            # assert isinstance(overflow_node, OverflowNode)
+            parts = overflow_node.chain_data()
+            if pairs_end <= len(data):
+                # pairs lie inside this page, only children region is pieced together with the chain.
+                parts.insert(0, children_data)
+                children_data = memoryview(b''.join(parts))[:children_len]
+            else:
+                parts.insert(0, data)
+                data = b''.join(parts)  # page and whole overflow chain copied once
+                children_data = memoryview(data)[pairs_end:pairs_end + children_len]
+        # unpack checks length of children region itself
+        self.children = list(_children_struct(children_len // PAGE_ADDRESS_LIMIT).unpack(children_data))
+        each_pair_len = _pair_struct(self.tree_conf.key_size, self.tree_conf.value_size).size
+        # pairs are deserialized lazily on access, hold offsets of them only.
+        offsets = list(range(header_end, pairs_end, each_pair_len))
+        # every descent through a branch searches it, a branch searched again is likely to be searched many times.
+        self.contents = LazyPairList(self.tree_conf, memoryview(data), offsets,
+                                     searches=LazyPairList.KEY_LIST_SEARCHES - 2 if self.children else 0)
 
     def _dump(self):
-        data = bytearray()
-        for pair in self.contents:
-            data.extend(pair.dump())
-        pairs_len = len(data)
-        for ch in self.children:
-            data.extend(ch.to_bytes(PAGE_ADDRESS_LIMIT, ENDIAN))
-        children_len = len(data) - pairs_len
         header_len = NODE_TYPE_LENGTH_LIMIT + 2 * NODE_CONTENTS_LENGTH_LIMIT + PAGE_ADDRESS_LIMIT
+        pair_len = _pair_struct(self.tree_conf.key_size, self.tree_conf.value_size).size
+        pairs_len = len(self.contents) * pair_len
+        children_len = len(self.children) * PAGE_ADDRESS_LIMIT
+        page_size = self.tree_conf.page_size
+        # write pairs and children into page buffer at their offsets directly.
+        page = bytearray(max(page_size, header_len + pairs_len + children_len))
+        if type(self.contents) is LazyPairList:
+            self.contents.dump_into(page, header_len)
+        else:
+            _pack_pairs(self.tree_conf, self.contents, page, header_len)
+        _children_struct(len(self.children)).pack_into(page, header_len + pairs_len, *self.children)
 
-        self._adjust_overflow_chain(data, header_len)
-
-        next_page = 0 if self.next_page is None else self.next_page
-        header = (
-                self.PAGE_TYPE.value.to_bytes(NODE_TYPE_LENGTH_LIMIT, ENDIAN) +
-                pairs_len.to_bytes(NODE_CONTENTS_LENGTH_LIMIT, ENDIAN) +
-                children_len.to_bytes(NODE_CONTENTS_LENGTH_LIMIT, ENDIAN) +
-                next_page.to_bytes(PAGE_ADDRESS_LIMIT, ENDIAN)
-        )
-        data = bytearray(header) + data
-        if len(data) < self.tree_conf.page_size:
-            padding = bytearray(self.tree_conf.page_size - len(data))
-            data.extend(padding)
-        self._dumped = data
-
-    def dump(self) -> bytes:
+        if len(page) > page_size or self._next_page:
+            with memoryview(page)[header_len:header_len + pairs_len + children_len] as data:
+                self._adjust_overflow_chain(data, header_len)
+            del page[page_size:]  # data behind this page has been moved into overflow pages
 
-        if self._dumped:
-            return bytes(self._dumped)
+        _BNODE_HEADER.pack_into(page, 0, self.PAGE_TYPE_VALUE, pairs_len, children_len, self._next_page)
+        self._dumped, self._dirty = page, False
 
-        self._dump()
+    def dump(self) -> bytes:
+        if self._dirty:
+            self._dump()
         return bytes(self._dumped)
 
+    def dump_view(self) -> memoryview:
+        if self._dirty:
+            self._dump()
+        return memoryview(self._dumped)
+
     def re_dump(self):
         """
         Intent to update self._dumped forcibly, only call by BNode instances.
+        Contents changed too much to sync incrementally, so just mark dumped data as stale,
+        it will be re-dumped the next time it's required.
         """
-        self._dump()
+        self._dirty = True
 
-    def _adjust_overflow_chain(self, data: bytearray, header_len: int):
+    def _adjust_overflow_chain(self, data: bytearray, header_len: int, head=None):
+        """
+        spill data behind this page into overflow chain, or drop the chain if data fits in page now.
+        data is left as it is, caller keeps only the part inside this page.
+        :param head: overflow node at `_next_page` if caller has fetched it already
+        """
         if len(data) + header_len > self.tree_conf.page_size:  # overflow
-            data[:] = self._create_or_update_overflow(bytes(data), header_len)
-            assert len(data) == self.tree_conf.page_size - header_len
-        elif len(data) + header_len <= self.tree_conf.page_size and self.next_page:
+            self._create_or_update_overflow(data, header_len, head)
+        elif self._next_page:
             # overflow before, but normal currently
-            self.tree.handler.get_node(self.next_page, tree=self.tree).set_as_deprecated()
-            self.next_page = None  # critical!
+            (head or self.tree.handler.get_node(self._next_page, tree=self.tree)).set_as_deprecated()
+            self._next_page = 0  # critical!
+
+    def _sync_dump(self, offset: int, replace_len: int, new_data: bytes, in_children: bool = False):
+        """
+        Replace `replace_len` bytes at `offset` of pairs region (or children region if `in_children`)
+        inside dumped data with `new_data`, and keep header and overflow chain in sync.
+        """
+        header_len = NODE_TYPE_LENGTH_LIMIT + 2 * NODE_CONTENTS_LENGTH_LIMIT + PAGE_ADDRESS_LIMIT
+        if type(self._dumped) is not bytearray:  # still the loaded page, copy on first write
+            self._dumped = bytearray(self._dumped)
+        _, pairs_len, children_len, _ = _BNODE_HEADER.unpack_from(self._dumped, 0)
+        orig_len = pairs_len + children_len
+        delta = len(new_data) - replace_len
+        if in_children:
+            offset += pairs_len
+            children_len += delta
+        else:
+            pairs_len += delta
+        page_size = self.tree_conf.page_size
+        if not delta and header_len + offset + replace_len <= page_size:
+            # same-size update inside this page, total length is unchanged so overflow chain stays as it is.
+            start = header_len + offset
+            self._dumped[start:start + replace_len] = new_data
+            return
+        if not self._next_page and header_len + orig_len + delta <= page_size:
+            # whole data stays inside this page, patch it in place.
+            # page buffer keeps its size, only the tail behind the patched range is shifted.
+            start, end = header_len + offset, header_len + orig_len
+            if delta:
+                self._dumped[start + replace_len + delta:end + delta] = self._dumped[start + replace_len:end]
+                if delta < 0:
+                    self._dumped[end + delta:end] = bytes(-delta)  # clear stale bytes left behind
+            self._dumped[start:start + len(new_data)] = new_data
+        else:
+            orig = self._dumped[header_len:header_len + orig_len]  # origin concrete data
+            head = None
+            if self._next_page:
+                # keep the head of chain, it's updated or deprecated below, don't fetch it twice.
+                head = self.tree.handler.get_node(self._next_page, tree=self.tree)
+                for part in head.chain_data():
+                    orig += part
+            orig[offset:offset + replace_len] = new_data
+
+            self._adjust_overflow_chain(orig, header_len, head)
+            del orig[page_size - header_len:]  # data behind this page has been moved into overflow pages
+
+            self._dumped = bytearray(page_size)
+            self._dumped[header_len:header_len + len(orig)] = orig
+        _BNODE_HEADER.pack_into(self._dumped, 0, self.PAGE_TYPE_VALUE, pairs_len, children_len, self._next_page)
+        assert len(self._dumped) == page_size
+
+    def _sync_dump_pair_child(self, pair_offset: int, pair_replace_len: int, new_pair: bytes,
+                              child_offset: int, child_replace_len: int, new_child: bytes):
+        """
+        Like `_sync_dump`, but edit pairs region and children region together, so the
+        dumped data is rewritten once instead of once per region.
+        """
+        header_len = NODE_TYPE_LENGTH_LIMIT + 2 * NODE_CONTENTS_LENGTH_LIMIT + PAGE_ADDRESS_LIMIT
+        if type(self._dumped) is not bytearray:  # still the loaded page, copy on first write
+            self._dumped = bytearray(self._dumped)
+        _, pairs_len, children_len, _ = _BNODE_HEADER.unpack_from(self._dumped, 0)
+        orig_len = pairs_len + children_len
+        child_offset += pairs_len
+        pair_delta = len(new_pair) - pair_replace_len
+        child_delta = len(new_child) - child_replace_len
+        delta = pair_delta + child_delta
+        page_size = self.tree_conf.page_size
+        if not self._next_page and header_len + orig_len + delta <= page_size:
+            # rebuild the data behind the edited pair once, both edits applied on the way.
+            start, end = header_len + pair_offset, header_len + orig_len
+            child_start = header_len + child_offset
+            tail = b''.join((new_pair, self._dumped[start + pair_replace_len:child_start], new_child,
+                             self._dumped[child_start + child_replace_len:end]))
+            self._dumped[start:start + len(tail)] = tail
+            if delta < 0:
+                self._dumped[end + delta:end] = bytes(-delta)  # clear stale bytes left behind
+        else:
+            orig = self._dumped[header_len:header_len + orig_len]  # origin concrete data
+            head = None
+            if self._next_page:
+                head = self.tree.handler.get_node(self._next_page, tree=self.tree)
+                for part in head.chain_data():
+                    orig += part
+            # children region lies behind pairs region, edit it first to keep pair offset valid.
+            orig[child_offset:child_offset + child_replace_len] = new_child
+            orig[pair_offset:pair_offset + pair_replace_len] = new_pair
+
+            self._adjust_overflow_chain(orig, header_len, head)
+            del orig[page_size - header_len:]  # data behind this page has been moved into overflow pages
+
+            self._dumped = bytearray(page_size)
+            self._dumped[header_len:header_len + len(orig)] = orig
+        _BNODE_HEADER.pack_into(self._dumped, 0, self.PAGE_TYPE_VALUE, pairs_len + pair_delta,
+                                children_len + child_delta, self._next_page)
+        assert len(self._dumped) == page_size
 
     # methods for sync data in internal dumped data with append/insert/update/pop ops
     # all methods must applied immediately when matched operation occurs.
     def update_content_in_dump(self, index: int, pair: KeyValPair):
         assert index < len(self.contents)
-        if self._dumped:
-            header_len = NODE_TYPE_LENGTH_LIMIT + 2 * NODE_CONTENTS_LENGTH_LIMIT + PAGE_ADDRESS_LIMIT
-            header = self._dumped[0:header_len]
-            pairs_len_end = NODE_TYPE_LENGTH_LIMIT + NODE_CONTENTS_LENGTH_LIMIT
-            pairs_len = int.from_bytes(bytes(header[NODE_TYPE_LENGTH_LIMIT:pairs_len_end]), ENDIAN)
-            children_len = int.from_bytes(
-                bytes(header[pairs_len_end:pairs_len_end + NODE_CONTENTS_LENGTH_LIMIT]), ENDIAN)
-            orig = self._dumped[header_len:header_len + pairs_len + children_len]  # origin concrete data
-            if self.next_page:
-                orig += bytearray(self.tree.handler.get_node(self.next_page, tree=self.tree).get_complete_data())
-            each_pair_len = KeyValPair(self.tree_conf).length
-            target_start = each_pair_len * index
-            orig[target_start:target_start + each_pair_len] = pair.dump()
-
-            self._adjust_overflow_chain(orig, header_len)
-
-            next_page = 0 if self.next_page is None else self.next_page
-            header[-PAGE_ADDRESS_LIMIT:] = next_page.to_bytes(PAGE_ADDRESS_LIMIT, ENDIAN)
-            self._dumped = header + orig
-            if len(self._dumped) < self.tree_conf.page_size:
-                padding = bytearray(self.tree_conf.page_size - len(self._dumped))
-                self._dumped.extend(padding)
-            assert len(self._dumped) == self.tree_conf.page_size
+        if not self._dirty:
+            each_pair_len = pair.length
+            self._sync_dump(each_pair_len * index, each_pair_len, pair.dump_view())
 
     def insert_content_in_dump(self, index: int, pair: KeyValPair):
         assert index <= len(self.contents)
-        if self._dumped:
-            header_len = NODE_TYPE_LENGTH_LIMIT + 2 * NODE_CONTENTS_LENGTH_LIMIT + PAGE_ADDRESS_LIMIT
-            header = self._dumped[0:header_len]
-            pairs_len_end = NODE_TYPE_LENGTH_LIMIT + NODE_CONTENTS_LENGTH_LIMIT
-            pairs_len = int.from_bytes(bytes(header[NODE_TYPE_LENGTH_LIMIT:pairs_len_end]), ENDIAN)
-            children_len = int.from_bytes(
-                bytes(header[pairs_len_end:pairs_len_end + NODE_CONTENTS_LENGTH_LIMIT]), ENDIAN)
-            orig = self._dumped[header_len:header_len + pairs_len + children_len]  # origin concrete data
-            if self.next_page:
-                orig += bytearray(self.tree.handler.get_node(self.next_page, tree=self.tree).get_complete_data())
-            each_pair_len = KeyValPair(self.tree_conf).length
-            target_start = each_pair_len * index
-            orig[target_start:target_start] = pair.dump()  # insert at pos: target start
-            pairs_len += each_pair_len  # update new pairs length
-            # update new pairs length in header
-            header[NODE_TYPE_LENGTH_LIMIT:pairs_len_end] = pairs_len.to_bytes(NODE_CONTENTS_LENGTH_LIMIT, ENDIAN)
-
-            self._adjust_overflow_chain(orig, header_len)
-
-            next_page = 0 if self.next_page is None else self.next_page
-            header[-PAGE_ADDRESS_LIMIT:] = next_page.to_bytes(PAGE_ADDRESS_LIMIT, ENDIAN)
-            self._dumped = header + orig
-            if len(self._dumped) < self.tree_conf.page_size:
-                padding = bytearray(self.tree_conf.page_size - len(self._dumped))
-                self._dumped.extend(padding)
-            assert len(self._dumped) == self.tree_conf.page_size
+        if not self._dirty:
+            self._sync_dump(pair.length * index, 0, pair.dump_view())  # insert at pos: target start
+
+    def insert_contents_in_dump(self, index: int, pairs: list):
+        """insert a run of pairs at index, by one rewrite"""
+        assert index + len(pairs) <= len(self.contents)
+        if not self._dirty:
+            pair_len = _pair_struct(self.tree_conf.key_size, self.tree_conf.value_size).size
+            pairs_data = bytearray(len(pairs) * pair_len)
+            _pack_pairs(self.tree_conf, pairs, pairs_data, 0)
+            self._sync_dump(pair_len * index, 0, pairs_data)
 
     def pop_content_in_dump(self, index: int):
         assert index <= len(self.contents)
-        if self._dumped:
-            header_len = NODE_TYPE_LENGTH_LIMIT + 2 * NODE_CONTENTS_LENGTH_LIMIT + PAGE_ADDRESS_LIMIT
-            header = self._dumped[0:header_len]
-            pairs_len_end = NODE_TYPE_LENGTH_LIMIT + NODE_CONTENTS_LENGTH_LIMIT
-            pairs_len = int.from_bytes(bytes(header[NODE_TYPE_LENGTH_LIMIT:pairs_len_end]), ENDIAN)
-            children_len = int.from_bytes(
-                bytes(header[pairs_len_end:pairs_len_end + NODE_CONTENTS_LENGTH_LIMIT]), ENDIAN)
-            orig = self._dumped[header_len:header_len + pairs_len + children_len]  # origin concrete data
-            if self.next_page:
-                orig += bytearray(self.tree.handler.get_node(self.next_page, tree=self.tree).get_complete_data())
-            each_pair_len = KeyValPair(self.tree_conf).length
-            target_start = each_pair_len * index
+        if not self._dirty:
+            each_pair_len = _pair_struct(self.tree_conf.key_size, self.tree_conf.value_size).size
             # remove target pair in dumped data at pos: target start
-            orig[target_start:target_start + each_pair_len] = b''
-            pairs_len -= each_pair_len  # update new pairs length
-            # update new pairs length in header
-            header[NODE_TYPE_LENGTH_LIMIT:pairs_len_end] = pairs_len.to_bytes(NODE_CONTENTS_LENGTH_LIMIT, ENDIAN)
-
-            self._adjust_overflow_chain(orig, header_len)
-
-            next_page = 0 if self.next_page is None else self.next_page
-            header[-PAGE_ADDRESS_LIMIT:] = next_page.to_bytes(PAGE_ADDRESS_LIMIT, ENDIAN)
-            self._dumped = header + orig
-            if len(self._dumped) < self.tree_conf.page_size:
-                padding = bytearray(self.tree_conf.page_size - len(self._dumped))
-                self._dumped.extend(padding)
-            assert len(self._dumped) == self.tree_conf.page_size
+            self._sync_dump(each_pair_len * index, each_pair_len, b'')
 
     def update_child_in_dump(self, index: int, child: int):
         assert index < len(self.children)
-        if self._dumped:
-            header_len = NODE_TYPE_LENGTH_LIMIT + 2 * NODE_CONTENTS_LENGTH_LIMIT + PAGE_ADDRESS_LIMIT
-            header = self._dumped[0:header_len]
-            pairs_len_end = NODE_TYPE_LENGTH_LIMIT + NODE_CONTENTS_LENGTH_LIMIT
-            pairs_len = int.from_bytes(bytes(header[NODE_TYPE_LENGTH_LIMIT:pairs_len_end]), ENDIAN)
-            children_len = int.from_bytes(
-                bytes(header[pairs_len_end:pairs_len_end + NODE_CONTENTS_LENGTH_LIMIT]), ENDIAN)
-            orig = self._dumped[header_len:header_len + pairs_len + children_len]  # origin concrete
-            if self.next_page:
-                orig += bytearray(self.tree.handler.get_node(self.next_page, tree=self.tree).get_complete_data())
-            target_start = pairs_len + index * PAGE_ADDRESS_LIMIT
-            orig[target_start:target_start + PAGE_ADDRESS_LIMIT] = child.to_bytes(PAGE_ADDRESS_LIMIT, ENDIAN)
-
-            self._adjust_overflow_chain(orig, header_len)
-
-            next_page = 0 if self.next_page is None else self.next_page
-            header[-PAGE_ADDRESS_LIMIT:] = next_page.to_bytes(PAGE_ADDRESS_LIMIT, ENDIAN)
-            self._dumped = header + orig
-            if len(self._dumped) < self.tree_conf.page_size:
-                padding = bytearray(self.tree_conf.page_size - len(self._dumped))
-                self._dumped.extend(padding)
-            assert len(self._dumped) == self.tree_conf.page_size
+        if not self._dirty:
+            self._sync_dump(index * PAGE_ADDRESS_LIMIT, PAGE_ADDRESS_LIMIT, _PAGE_ADDRESS.pack(child),
+                            in_children=True)
 
     def insert_child_in_dump(self, index: int, child: int):
         assert index <= len(self.children)
-        if self._dumped:
-            header_len = NODE_TYPE_LENGTH_LIMIT + 2 * NODE_CONTENTS_LENGTH_LIMIT + PAGE_ADDRESS_LIMIT
-            header = self._dumped[0:header_len]
-            pairs_len_end = NODE_TYPE_LENGTH_LIMIT + NODE_CONTENTS_LENGTH_LIMIT
-            pairs_len = int.from_bytes(bytes(header[NODE_TYPE_LENGTH_LIMIT:pairs_len_end]), ENDIAN)
-            children_len = int.from_bytes(
-                bytes(header[pairs_len_end:pairs_len_end + NODE_CONTENTS_LENGTH_LIMIT]), ENDIAN)
-            orig = self._dumped[header_len:header_len + pairs_len + children_len]  # origin concrete data
-            if self.next_page:
-                orig += bytearray(self.tree.handler.get_node(self.next_page, tree=self.tree).get_complete_data())
-            target_start = pairs_len + index * PAGE_ADDRESS_LIMIT
-            orig[target_start:target_start] = child.to_bytes(PAGE_ADDRESS_LIMIT, ENDIAN)  # insert at pos: target start
-            children_len += PAGE_ADDRESS_LIMIT  # update new pairs length
-            # update new children length in header
-            header[pairs_len_end:pairs_len_end + NODE_CONTENTS_LENGTH_LIMIT] = children_len.to_bytes(
-                NODE_CONTENTS_LENGTH_LIMIT, ENDIAN)
-
-            self._adjust_overflow_chain(orig, header_len)
-
-            next_page = 0 if self.next_page is None else self.next_page
-            header[-PAGE_ADDRESS_LIMIT:] = next_page.to_bytes(PAGE_ADDRESS_LIMIT, ENDIAN)
-            self._dumped = header + orig
-            if len(self._dumped) < self.tree_conf.page_size:
-                padding = bytearray(self.tree_conf.page_size - len(self._dumped))
-                self._dumped.extend(padding)
-            assert len(self._dumped) == self.tree_conf.page_size
+        if not self._dirty:
+            # insert at pos: target start
+            self._sync_dump(index * PAGE_ADDRESS_LIMIT, 0, _PAGE_ADDRESS.pack(child), in_children=True)
 
     def pop_child_in_dump(self, index: int):
         assert index <= len(self.children)
-        if self._dumped:
-            header_len = NODE_TYPE_LENGTH_LIMIT + 2 * NODE_CONTENTS_LENGTH_LIMIT + PAGE_ADDRESS_LIMIT
-            header = self._dumped[0:header_len]
-            pairs_len_end = NODE_TYPE_LENGTH_LIMIT + NODE_CONTENTS_LENGTH_LIMIT
-            pairs_len = int.from_bytes(bytes(header[NODE_TYPE_LENGTH_LIMIT:pairs_len_end]), ENDIAN)
-            children_len = int.from_bytes(
-                bytes(header[pairs_len_end:pairs_len_end + NODE_CONTENTS_LENGTH_LIMIT]), ENDIAN)
-            orig = self._dumped[header_len:header_len + pairs_len + children_len]  # origin concrete data
-            if self.next_page:
-                orig += bytearray(self.tree.handler.get_node(self.next_page, tree=self.tree).get_complete_data())
-            target_start = pairs_len + index * PAGE_ADDRESS_LIMIT
-            orig[target_start:target_start + PAGE_ADDRESS_LIMIT] = b''  # remove at pos: target start
-            children_len -= PAGE_ADDRESS_LIMIT  # update new pairs length
-            # update new children length in header
-            header[pairs_len_end:pairs_len_end + NODE_CONTENTS_LENGTH_LIMIT] = children_len.to_bytes(
-                NODE_CONTENTS_LENGTH_LIMIT, ENDIAN)
-
-            self._adjust_overflow_chain(orig, header_len)
-
-            next_page = 0 if self.next_page is None else self.next_page
-            header[-PAGE_ADDRESS_LIMIT:] = next_page.to_bytes(PAGE_ADDRESS_LIMIT, ENDIAN)
-            self._dumped = header + orig
-            if len(self._dumped) < self.tree_conf.page_size:
-                padding = bytearray(self.tree_conf.page_size - len(self._dumped))
-                self._dumped.extend(padding)
-            assert len(self._dumped) == self.tree_conf.page_size
+        if not self._dirty:
+            # remove at pos: target start
+            self._sync_dump(index * PAGE_ADDRESS_LIMIT, PAGE_ADDRESS_LIMIT, b'', in_children=True)
+
+    def insert_pair_child_in_dump(self, index: int, pair: KeyValPair, child_index: int, child: int):
+        assert index <= len(self.contents) and child_index <= len(self.children)
+        if not self._dirty:
+            self._sync_dump_pair_child(pair.length * index, 0, pair.dump_view(),
+                                       child_index * PAGE_ADDRESS_LIMIT, 0, _PAGE_ADDRESS.pack(child))
+
+    def pop_pair_child_in_dump(self, index: int, child_index: int):
+        assert index <= len(self.contents) and child_index <= len(self.children)
+        if not self._dirty:
+            each_pair_len = _pair_struct(self.tree_conf.key_size, self.tree_conf.value_size).size
+            self._sync_dump_pair_child(each_pair_len * index, each_pair_len, b'',
+                                       child_index * PAGE_ADDRESS_LIMIT, PAGE_ADDRESS_LIMIT, b'')
+
+    def extend_in_dump(self, pairs: list, children: list):
+        """append pairs and children to the end of their regions, by one rewrite"""
+        if not self._dirty:
+            pair_len = _pair_struct(self.tree_conf.key_size, self.tree_conf.value_size).size
+            pairs_data = bytearray(len(pairs) * pair_len)
+            _pack_pairs(self.tree_conf, pairs, pairs_data, 0)
+            children_data = _children_struct(len(children)).pack(*children)
+            # origin length == current length - appended length, cuz extend already
+            self._sync_dump_pair_child((len(self.contents) - len(pairs)) * pair_len, 0, pairs_data,
+                                       (len(self.children) - len(children)) * PAGE_ADDRESS_LIMIT, 0, children_data)
+
+    def truncate_in_dump(self):
+        """drop pairs and children behind current length of contents and children from dumped data"""
+        if self._dirty:
+            return
+        if self._next_page:
+            self.re_dump()  # overflow chain shrinks as well, leave it to re-dump
+            return
+        header_len = NODE_TYPE_LENGTH_LIMIT + 2 * NODE_CONTENTS_LENGTH_LIMIT + PAGE_ADDRESS_LIMIT
+        if type(self._dumped) is not bytearray:  # still the loaded page, copy on first write
+            self._dumped = bytearray(self._dumped)
+        _, pairs_len, children_len, _ = _BNODE_HEADER.unpack_from(self._dumped, 0)
+        new_pairs_len = len(self.contents) * _pair_struct(self.tree_conf.key_size, self.tree_conf.value_size).size
+        new_children_len = len(self.children) * PAGE_ADDRESS_LIMIT
+        # kept children move forward to the end of kept pairs, the rest is cleared.
+        children_start, new_children_start = header_len + pairs_len, header_len + new_pairs_len
+        self._dumped[new_children_start:new_children_start + new_children_len] = \
+            self._dumped[children_start:children_start + new_children_len]
+        end, new_end = children_start + children_len, new_children_start + new_children_len
+        self._dumped[new_end:end] = bytes(end - new_end)
+        _BNODE_HEADER.pack_into(self._dumped, 0, self.PAGE_TYPE_VALUE, new_pairs_len, new_children_len, 0)
 
     def lateral(self, parent, parent_index, target, target_index):
         """
         lend one element from parent[parent_index] to target[target_index].
+        pair and child moved between branches are synced into dumped data by one rewrite per node.
         """
         if parent_index > target_index:
-            target.contents.append(parent.contents[target_index])
-            # origin len(target.content) == current len(...) - 1, cuz append already
-            target.insert_content_in_dump(len(target.contents) - 1, parent.contents[target_index])
+            pair_to_lend = parent.contents[target_index]
+            target.contents.append(pair_to_lend)
             content_to_pop = self.contents.pop(0)
-            self.pop_content_in_dump(0)
-            parent.contents[target_index] = content_to_pop
-            parent.update_content_in_dump(target_index, content_to_pop)
             if self.children:
                 child_to_pop = self.children.pop(0)
-                self.pop_child_in_dump(0)
                 target.children.append(child_to_pop)
-                target.insert_child_in_dump(len(target.children) - 1, child_to_pop)
+                # origin len(...) == current len(...) - 1, cuz append already
+                target.insert_pair_child_in_dump(len(target.contents) - 1, pair_to_lend,
+                                                 len(target.children) - 1, child_to_pop)
+                self.pop_pair_child_in_dump(0, 0)
+            else:
+                target.insert_content_in_dump(len(target.contents) - 1, pair_to_lend)
+                self.pop_content_in_dump(0)
+            parent.contents[target_index] = content_to_pop
+            parent.update_content_in_dump(target_index, content_to_pop)
         else:
-            target.contents.insert(0, parent.contents[parent_index])
-            target.insert_content_in_dump(0, parent.contents[parent_index])
+            pair_to_lend = parent.contents[parent_index]
+            target.contents.insert(0, pair_to_lend)
             content_to_pop = self.contents.pop()
-            # origin tail index == current len(...), cuz pop already
-            self.pop_content_in_dump(len(self.contents))
-            parent.contents[parent_index] = content_to_pop
-            parent.update_content_in_dump(parent_index, content_to_pop)
             if self.children:
                 child_to_pop = self.children.pop()
-                self.pop_child_in_dump(len(self.children))
                 target.children.insert(0, child_to_pop)
-                target.insert_child_in_dump(0, child_to_pop)
+                target.insert_pair_child_in_dump(0, pair_to_lend, 0, child_to_pop)
+                # origin tail index == current len(...), cuz pop already
+                self.pop_pair_child_in_dump(len(self.contents), len(self.children))
+            else:
+                target.insert_content_in_dump(0, pair_to_lend)
+                self.pop_content_in_dump(len(self.contents))
+            parent.contents[parent_index] = content_to_pop
+            parent.update_content_in_dump(parent_index, content_to_pop)
         # update nodes inside handler
         self.tree.handler.set_node(parent)
         self.tree.handler.set_node(target)
+        self.tree.handler.set_node(self)
 
     def shrink(self, ancestors: list):
         """
         shrink from current node up to the root until test_tree is balanced.
+        climbs ancestors in a loop, a parent over-filled by the median is shrunk by the next round.
         :param ancestors: ancestors from root to current node
         """
-        parent = None
-
-        if ancestors:
-            parent, parent_index = ancestors.pop()
-            # try to lend to the left neighboring sibling
-            if parent_index:
-                left_sib = self.tree.handler.get_node(parent.children[parent_index - 1], tree=self.tree)
-                if len(left_sib.contents) < self.tree_conf.order:
-                    self.lateral(
-                        parent, parent_index, left_sib, parent_index - 1)
-                    return
-
-            # try the right neighbor
-            if parent_index + 1 < len(parent.children):
-                right_sib = self.tree.handler.get_node(parent.children[parent_index + 1], tree=self.tree)
-                if len(right_sib.contents) < self.tree_conf.order:
-                    self.lateral(
-                        parent, parent_index, right_sib, parent_index + 1)
-                    return
-
-        sibling, mid_pair = self.split()
-
-        if not parent:
-            parent, parent_index = self.tree.BRANCH(tree=self.tree,
-                                                    tree_conf=self.tree_conf, children=[self.page]), 0
-            self.tree._root = parent
-            self.tree.handler.ensure_root_block(self.tree._root)
-
-        # pass the median up to the parent
-        parent.contents.insert(parent_index, mid_pair)
-        parent.insert_content_in_dump(parent_index, mid_pair)
-        parent.children.insert(parent_index + 1, sibling.page)
-        parent.insert_child_in_dump(parent_index + 1, sibling.page)
-        if len(parent.contents) > parent.tree.order:
-            parent.shrink(ancestors)
-        self.tree.handler.set_node(parent)  # sync
-        self.tree.handler.set_node(sibling)  # IMPORTANT!
+        order = self.tree_conf.order
+        handler = self.tree.handler
+        node = self
+        while True:
+            parent = None
+            if ancestors:
+                parent, parent_index = ancestors.pop()
+                # try to lend to the left neighboring sibling
+                if parent_index:
+                    left_sib = handler.get_node(parent.children[parent_index - 1], tree=self.tree)
+                    if len(left_sib.contents) < order:
+                        node.lateral(
+                            parent, parent_index, left_sib, parent_index - 1)
+                        return
+
+                # try the right neighbor
+                if parent_index + 1 < len(parent.children):
+                    right_sib = handler.get_node(parent.children[parent_index + 1], tree=self.tree)
+                    if len(right_sib.contents) < order:
+                        node.lateral(
+                            parent, parent_index, right_sib, parent_index + 1)
+                        return
+
+            sibling, mid_pair = node.split()
+
+            if not parent:
+                parent, parent_index = self.tree.BRANCH(tree=self.tree,
+                                                        tree_conf=self.tree_conf, children=[node.page]), 0
+                self.tree._root = parent
+                handler.ensure_root_block(self.tree._root)
+
+            # pass the median up to the parent
+            parent.contents.insert(parent_index, mid_pair)
+            parent.children.insert(parent_index + 1, sibling.page)
+            parent.insert_pair_child_in_dump(parent_index, mid_pair, parent_index + 1, sibling.page)
+            handler.set_node(node)  # sync
+            handler.set_node(sibling)  # IMPORTANT!
+            if len(parent.contents) <= order:
+                handler.set_node(parent)
+                return
+            node = parent
+
+    def bisect(self, key) -> int:
+        """position of key in contents, as `bisect.bisect_left` does"""
+        contents = self.contents
+        if type(contents) is LazyPairList:
+            return contents.bisect_left(key)
+        if _KEYED_BISECT:
+            return bisect.bisect_left(contents, key, key=_pair_key)
+        # compare keys of pairs directly, it's much cheaper than dispatching to `KeyValPair.__lt__`.
+        lo, hi = 0, len(contents)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if contents[mid]._key < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def find(self, key) -> tuple:
+        """position of key in contents as `bisect` gives, and whether key is at that position"""
+        contents = self.contents
+        if type(contents) is LazyPairList:
+            return contents.find(key)
+        index = self.bisect(key)
+        return index, index < len(contents) and contents[index]._key == key
+
+    def key_at(self, index: int):
+        """key of pair at index of contents"""
+        if type(self.contents) is LazyPairList:
+            return self.contents.key_at(index)
+        return self.contents[index].key
+
+    def iter_items(self, start: int = 0):
+        """key and value of pairs in contents from index start, in order"""
+        if type(self.contents) is LazyPairList:
+            return self.contents.iter_items(start)
+        return ((it.key, it.value) for it in (self.contents[start:] if start else self.contents))
+
+    def iter_keys(self, start: int = 0):
+        """keys of pairs in contents from index start, in order"""
+        if type(self.contents) is LazyPairList:
+            return self.contents.iter_keys(start)
+        return (it.key for it in (self.contents[start:] if start else self.contents))
+
+    def value_at(self, index: int):
+        """value of pair at index of contents"""
+        if type(self.contents) is LazyPairList:
+            return self.contents.value_at(index)
+        return self.contents[index].value
 
     def split(self):
         """
@@ -647,76 +1113,113 @@ class BNode(BaseBNode):
             children=self.children[center + 1:])
         self.contents = self.contents[:center]
         self.children = self.children[:center + 1]
-        self._dump()  # update self._dumped
+        self.truncate_in_dump()
         return sibling, mid_pair
 
+    def set_as_deprecated(self):
+        """
+        node is consolidated into its sibling or it's an emptied root, give its page and overflow pages
+        back to page GC, so next split takes them instead of growing the db file.
+        """
+        handler = self.tree.handler
+        if self._next_page:
+            handler.get_node(self._next_page, tree=self.tree).set_as_deprecated()
+            self._next_page = 0
+        handler.set_deprecated_data(self.page, _NODE_TYPE.pack(_PageType.DEPRECATED_PAGE.value))
+        handler.collect_deprecated_page(self.page)
+
     def grow(self, ancestors: list):
         """
         grow from current node up to the root until test_tree is balanced,
         by trying borrowing items from siblings or consolidate with siblings.
+        climbs ancestors in a loop, a parent left under-filled by consolidation is grown by the next round.
+        nodes changed are synced here, a consolidated node is deprecated and must not be synced again.
         :param ancestors: ancestors from root to current node
         """
-        parent, parent_index = ancestors.pop()
-        left_sib = right_sib = None
-        # try to borrow from the right sibling
-        if parent_index + 1 < len(parent.children):
-            right_sib = self.tree.handler.get_node(parent.children[parent_index + 1], tree=self.tree)
-            if len(right_sib.contents) > self.tree.min_elements:
-                right_sib.lateral(parent, parent_index + 1, self, parent_index)
-                return
-
-        # try to borrow from the left sibling
-        if parent_index:
-            left_sib = self.tree.handler.get_node(parent.children[parent_index - 1], tree=self.tree)
-            if len(left_sib.contents) > self.tree.min_elements:
-                left_sib.lateral(parent, parent_index - 1, self, parent_index)
-                return
+        min_elements = self.tree.min_elements
+        handler = self.tree.handler
+        node = self
+        while True:
+            parent, parent_index = ancestors.pop()
+            left_sib = right_sib = None
+            # try to borrow from the right sibling
+            if parent_index + 1 < len(parent.children):
+                right_sib = handler.get_node(parent.children[parent_index + 1], tree=self.tree)
+                if len(right_sib.contents) > min_elements:
+                    right_sib.lateral(parent, parent_index + 1, node, parent_index)
+                    return
 
-        # consolidate with a sibling - try left first
-        if left_sib:
-            left_sib.contents.append(parent.contents[parent_index - 1])
-            left_sib.contents.extend(self.contents)
-            if self.children:
-                left_sib.children.extend(self.children)
-            left_sib.re_dump()
-            parent.contents.pop(parent_index - 1)
-            parent.children.pop(parent_index)
-            parent.pop_content_in_dump(parent_index - 1)
-            parent.pop_child_in_dump(parent_index)
-            # sync
-            self.tree.handler.set_node(left_sib)
-            self.tree.handler.set_node(parent)
-        else:
-            self.contents.append(parent.contents[parent_index])
-            self.contents.extend(right_sib.contents)
-            if self.children:
-                self.children.extend(right_sib.children)
-            self.re_dump()
-            parent.contents.pop(parent_index)
-            parent.children.pop(parent_index + 1)
-            parent.pop_content_in_dump(parent_index)
-            parent.pop_child_in_dump(parent_index + 1)
-            # sync
-            self.tree.handler.set_node(self)
-            self.tree.handler.set_node(parent)
+            # try to borrow from the left sibling
+            if parent_index:
+                left_sib = handler.get_node(parent.children[parent_index - 1], tree=self.tree)
+                if len(left_sib.contents) > min_elements:
+                    left_sib.lateral(parent, parent_index - 1, node, parent_index)
+                    return
 
-        if len(parent.contents) < self.tree.min_elements:
+            # consolidate with a sibling - try left first
+            if left_sib:
+                pairs_to_merge = [parent.contents[parent_index - 1], *node.contents]
+                left_sib.contents.extend(pairs_to_merge)
+                left_sib.children.extend(node.children)
+                left_sib.extend_in_dump(pairs_to_merge, node.children)
+                node.contents = []  # pairs are owned by left sibling now
+                # `del` rather than `pop`, popping a lazy slot would build a pair only to drop it.
+                del parent.contents[parent_index - 1]
+                del parent.children[parent_index]
+                parent.pop_pair_child_in_dump(parent_index - 1, parent_index)
+                # sync
+                handler.set_node(left_sib)
+                handler.set_node(parent)
+                node.set_as_deprecated()
+            else:
+                pairs_to_merge = [parent.contents[parent_index], *right_sib.contents]
+                node.contents.extend(pairs_to_merge)
+                node.children.extend(right_sib.children)
+                node.extend_in_dump(pairs_to_merge, right_sib.children)
+                right_sib.contents = []  # pairs are owned by node now
+                del parent.contents[parent_index]
+                del parent.children[parent_index + 1]
+                parent.pop_pair_child_in_dump(parent_index, parent_index + 1)
+                # sync
+                handler.set_node(node)
+                handler.set_node(parent)
+                right_sib.set_as_deprecated()
+
+            if len(parent.contents) >= min_elements:
+                return
             if ancestors:
                 # parent is not the root
-                parent.grow(ancestors)
-            elif not parent.contents:
+                node = parent
+                continue
+            if not parent.contents:
                 # parent is root, and it's now empty
-                self.tree._root = left_sib or self
-                self.tree.handler.ensure_root_block(self.tree._root)
+                parent.set_as_deprecated()
+                self.tree._root = left_sib or node
+                handler.ensure_root_block(self.tree._root)
+            return
 
     def insert(self, index, key, value, ancestors):
         pair_to_insert = KeyValPair(self.tree_conf, key=key, value=value)
+        # order is stored in one byte of meta page, shifting at most 255 slots in a plain list
+        # is cheaper than keeping contents in any sorted container.
         self.contents.insert(index, pair_to_insert)
         self.insert_content_in_dump(index, pair_to_insert)
         if len(self.contents) > self.tree_conf.order:
             self.shrink(ancestors)
         self.tree.handler.set_node(self)
 
+    def bulk_insert_sorted(self, index, pairs: list, ancestors):
+        """
+        insert a sorted run of pairs which all belong at index, with one dump patch and one shrink at most.
+        shrink moves out a single pair, so a run longer than one should not push node over `order + 1` pairs.
+        a node over-filled already is split by shrink as `insert` does.
+        """
+        self.contents[index:index] = pairs
+        self.insert_contents_in_dump(index, pairs)
+        if len(self.contents) > self.tree_conf.order:
+            self.shrink(ancestors)
+        self.tree.handler.set_node(self)
+
     def remove(self, index, ancestors):
 
         if self.children:
@@ -731,9 +1234,9 @@ class BNode(BaseBNode):
                 ancestors.extend(additional_ancestors)
                 self.contents[index] = descendant.contents[0]
                 self.update_content_in_dump(index, descendant.contents[0])
-                descendant.remove(0, ancestors)
+                # sync before descendant grows, this node may be consolidated and deprecated by then.
                 self.tree.handler.set_node(self)
-                self.tree.handler.set_node(descendant)
+                descendant.remove(0, ancestors)
                 return
 
             # fall back to the left child
@@ -746,12 +1249,17 @@ class BNode(BaseBNode):
             ancestors.extend(additional_ancestors)
             self.contents[index] = descendant.contents[-1]
             self.update_content_in_dump(index, descendant.contents[-1])
-            descendant.remove(len(descendant.children) - 1, ancestors)
+            # sync before descendant grows, this node may be consolidated and deprecated by then.
             self.tree.handler.set_node(self)
-            self.tree.handler.set_node(descendant)
+            descendant.remove(len(descendant.contents) - 1, ancestors)
         else:
-            self.contents.pop(index)
+            del self.contents[index]
             self.pop_content_in_dump(index)
             if len(self.contents) < self.tree.min_elements and ancestors:
-                self.grow(ancestors)
-            self.tree.handler.set_node(self)
+                self.grow(ancestors)  # syncs every node it changes
+            else:
+                self.tree.handler.set_node(self)
+
+
+# node class indexed by page type, deprecated pages have no node class
+_NODE_CLASSES = (BNode, OverflowNode, None)
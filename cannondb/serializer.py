@@ -5,6 +5,16 @@ from uuid import UUID
 
 from cannondb.constants import INT_FORMAT, FLOAT_FORMAT
 
+try:
+    import orjson
+except ImportError:  # optional, json is used instead
+    orjson = None
+
+
+# formats are compiled once, `struct.pack(fmt, ...)` looks its format up in struct's cache on every call.
+_INT = struct.Struct(INT_FORMAT)
+_FLOAT = struct.Struct(FLOAT_FORMAT)
+
 
 class NoSerializerError(Exception):
     pass
@@ -30,62 +40,77 @@ class Serializer(metaclass=ABCMeta):
 class IntSerializer(Serializer):
     __slots__ = []
 
-    @staticmethod
-    def serialize(obj: int) -> bytes:
-        return struct.pack(INT_FORMAT, obj)
+    # packing is delegated to compiled struct directly, no python frame in between.
+    serialize = staticmethod(_INT.pack)
 
     @staticmethod
     def deserialize(data: bytes) -> int:
-        return struct.unpack(INT_FORMAT, data)[0]
+        return _INT.unpack(data)[0]
 
 
 class FloatSerializer(Serializer):
     __slots__ = []
 
-    @staticmethod
-    def serialize(obj: object) -> bytes:
-        return struct.pack(FLOAT_FORMAT, obj)
+    serialize = staticmethod(_FLOAT.pack)
 
     @staticmethod
     def deserialize(data: bytes) -> float:
-        return struct.unpack(FLOAT_FORMAT, data)[0]
+        return _FLOAT.unpack(data)[0]
 
 
+# utf-8 is the default codec of encode/decode, calling them bare takes CPython's fast path for it,
+# spelling the codec out (worst of all as keyword) parses and normalizes its name on every call.
 class StrSerializer(Serializer):
     __slots__ = []
 
     @staticmethod
     def serialize(obj: str) -> bytes:
-        return obj.encode(encoding='utf-8')
+        return obj.encode()
 
     @staticmethod
     def deserialize(data: bytes) -> str:
-        return data.decode(encoding='utf-8')
+        return data.decode()
+
+
+def _json_dumps(obj) -> bytes:
+    return json.dumps(obj, ensure_ascii=False).encode()
+
+
+# values are always written by json, orjson writes NaN and infinity as null and accepts types json rejects,
+# so what a tree stores would depend on whether it's installed. orjson only reads, about 2x faster than json,
+# and leaves to json what it can't read back the same (NaN, infinity, ints beyond 64 bits).
+if orjson is None:
+    def _json_loads(data: bytes):
+        return json.loads(data.decode())
+else:
+    # orjson decodes ints beyond 64 bits as float silently, data having such a long digit run is left to json.
+    # digits are mapped to b'0' and the run is found by a substring search, a regex scan of the same data costs
+    # more than json decoding it (800 bytes of ints: json 10us, orjson 2.4us, regex 17us, this 1.4us).
+    _DIGITS_AS_ZERO = bytes(48 if 48 <= c <= 57 else 32 for c in range(256))
+    _LONG_DIGITS = b'0' * 19
+
+    def _json_loads(data: bytes):
+        if _LONG_DIGITS not in data.translate(_DIGITS_AS_ZERO):
+            try:
+                return orjson.loads(data)
+            except orjson.JSONDecodeError:
+                pass
+        return json.loads(data.decode())
 
 
 class DictSerializer(Serializer):
     __slots__ = []
 
-    @staticmethod
-    def serialize(obj: dict) -> bytes:
-        return json.dumps(obj, ensure_ascii=False).encode(encoding='utf-8')
-
-    @staticmethod
-    def deserialize(data: bytes) -> dict:
-        return json.loads(data.decode(encoding='utf-8'))
+    serialize = staticmethod(_json_dumps)
+    deserialize = staticmethod(_json_loads)
 
 
 # both list and tuple are supported, but elements can only be json types.
 class ListSerializer(Serializer):
     __slots__ = []
 
-    @staticmethod
-    def serialize(obj: [list, tuple]) -> bytes:
-        return json.dumps(obj, ensure_ascii=False).encode(encoding='utf-8')
-
-    @staticmethod
-    def deserialize(data: bytes) -> [list, tuple]:
-        return json.loads(data.decode(encoding='utf-8'))
+    serialize = staticmethod(_json_dumps)
+    deserialize = staticmethod(_json_loads)
 
 
 class UUIDSerializer(Serializer):
@@ -121,6 +146,15 @@ type_num_map = {
 
 type_num_map.update(dict(zip(type_num_map.values(), type_num_map.keys())))
 
+# serializer indexed by type-num directly, skip the type-num -> type -> serializer chain
+num_serializer_map = {num: serializer_map[t] for num, t in type_num_map.items() if isinstance(num, int)}
+
+# deserialize function indexed by type-num, resolved once for hot paths decoding a single field
+num_deserializer_map = {num: ser.deserialize for num, ser in num_serializer_map.items()}
+
+# serializer together with type-num of each type, both are required when a pair is dumped
+serializer_info_map = {t: (ser, type_num_map[t]) for t, ser in serializer_map.items()}
+
 
 def serializer_switcher(t: [int, float, str, dict, list, UUID]) -> Serializer:
     """return corresponding serializer to arg type"""
@@ -130,9 +164,25 @@ def serializer_switcher(t: [int, float, str, dict, list, UUID]) -> Serializer:
         raise NoSerializerError('No corresponding serializer')
 
 
+def serializer_info(t: [int, float, str, dict, list, UUID]) -> tuple:
+    """return corresponding serializer and type-num to arg type by one lookup"""
+    try:
+        return serializer_info_map[t]
+    except KeyError:
+        raise NoSerializerError('No corresponding serializer')
+
+
 def type_switcher(num_or_type):
     """return type(type-num) by type-num(type)"""
     try:
         return type_num_map[num_or_type]
     except KeyError:
         raise ValueError('No corresponding type to number {}'.format(num_or_type))
+
+
+def num_serializer_switcher(num: int) -> Serializer:
+    """return corresponding serializer to type-num"""
+    try:
+        return num_serializer_map[num]
+    except KeyError:
+        raise ValueError('No corresponding type to number {}'.format(num))
@@ -3,7 +3,6 @@
 - MemoryStorage: Store data into memory.
 """
 
-import multiprocessing
 import threading
 
 from cannondb.btree import BTree
@@ -14,30 +13,42 @@ FileStorage = BTree
 class MemoryStorage(object):
     """
     Store key-value pairs just in memory.
+    Only writers take a lock, single dict operations are atomic under GIL, so readers go lock-free.
+    Locks are striped by hash of key, writers of different keys mostly don't wait for each other.
     """
-    __slots__ = ('_memory', '_lock')
+    __slots__ = ('_memory', '_locks')
+
+    LOCK_STRIPES = 16  # power of 2, stripe is picked by low bits of hash
 
     def __init__(self, *, m_process=False):
         super(MemoryStorage, self).__init__()
         self._memory = dict()
-        self._lock = threading.Lock() if not m_process else multiprocessing.Lock()
+        if m_process:
+            import multiprocessing  # heavy to import, only storages shared by processes need it
+            lock_type = multiprocessing.Lock
+        else:
+            lock_type = threading.Lock
+        self._locks = [lock_type() for _ in range(self.LOCK_STRIPES)]
+
+    def _lock_of(self, key):
+        return self._locks[hash(key) & (self.LOCK_STRIPES - 1)]
 
     def insert(self, key, value, override=False):
-        with self._lock:
+        with self._lock_of(key):
             if key not in self._memory or override:
                 self._memory[key] = value
             else:
                 raise ValueError('{key} has existed'.format(key=key))
 
     def remove(self, key):
-        with self._lock:
+        with self._lock_of(key):
             if key in self._memory:
                 self._memory.pop(key)
             else:
                 raise KeyError('{key} not in {self}'.format(key=key, self=self.__class__.__name__))
 
     def get(self, key, default=None):
-        return self._memory.get(key, default=default)
+        return self._memory.get(key, default)
 
     def __getitem__(self, item):
         return self._memory.__getitem__(item)
@@ -48,14 +59,20 @@ class MemoryStorage(object):
     def __len__(self):
         return len(self._memory)
 
-    def keys(self):
-        return self._memory.keys()
+    # snapshots are copied by one C-level call, views would fail iterating while another thread writes.
+    def keys(self) -> list:
+        return list(self._memory)
+
+    def values(self) -> list:
+        return list(self._memory.values())
 
-    def values(self):
-        return self._memory.values()
+    def items(self) -> list:
+        return list(self._memory.items())
 
-    def items(self):
-        return self._memory.items()
+    def range(self, start=None, stop=None):
+        """key-value pairs in order whose keys lie in [start, stop), a bound of None is open"""
+        return iter(sorted((key, value) for key, value in self.items()
+                           if (start is None or key >= start) and (stop is None or key < stop)))
 
     def checkpoint(self):
         pass
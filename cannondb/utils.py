@@ -4,6 +4,10 @@
 import io
 import math
 import os
+from collections import OrderedDict
+
+
+_pread = getattr(os, 'pread', None)  # not available on Windows
 
 
 class EndOfFileError(Exception):
@@ -14,12 +18,9 @@ def open_database_file(file_name, suffix='.cdb'):
     """
     Open a file in binary mode, if not exist then create it
     """
-    if os.path.exists(file_name):
-        f = open(file_name + suffix, 'rb+', buffering=0)
-    else:
-        fd = os.open(file_name + suffix, os.O_RDWR | os.O_CREAT)
-        f = os.fdopen(fd, 'rb+')
-    return f
+    # unbuffered, so data written is seen by `pread_from_file` at once, writes are batched by callers anyway.
+    fd = os.open(file_name + suffix, os.O_RDWR | os.O_CREAT | getattr(os, 'O_BINARY', 0))
+    return os.fdopen(fd, 'rb+', buffering=0)
 
 
 def file_flush_and_sync(f: io.FileIO):
@@ -34,21 +35,49 @@ def read_from_file(file_fd: io.FileIO, start: int, stop: int) -> bytes:
     length = stop - start
     assert length >= 0
     file_fd.seek(start)
-    data = bytes()
-    while file_fd.tell() < stop:
-        read_data = file_fd.read(stop - file_fd.tell())
-        if read_data == b'':
-            raise EndOfFileError('Read until the end of file_fd')
-        data += read_data
+    data = file_fd.read(length)  # mostly done by one read, return it as is without copying
+    if len(data) < length:
+        chunks = [data]
+        remaining = length - len(data)
+        while remaining > 0:
+            read_data = file_fd.read(remaining)
+            if read_data == b'':
+                raise EndOfFileError('Read until the end of file_fd')
+            chunks.append(read_data)
+            remaining -= len(read_data)
+        data = b''.join(chunks)
     assert len(data) == length
     return data
 
 
+def pread_from_file(file_fd: io.FileIO, start: int, stop: int) -> bytes:
+    """
+    read data between start and stop by one system call where `os.pread` is available, rather than a seek
+    and a read. Position of file is left undefined, callers must not rely on it.
+    """
+    if _pread is None:
+        return read_from_file(file_fd, start, stop)
+    length = stop - start
+    data = _pread(file_fd.fileno(), length, start)
+    if len(data) < length:
+        chunks = [data]
+        read_len = len(data)
+        while read_len < length:
+            read_data = _pread(file_fd.fileno(), length - read_len, start + read_len)
+            if read_data == b'':
+                raise EndOfFileError('Read until the end of file_fd')
+            chunks.append(read_data)
+            read_len += len(read_data)
+        data = b''.join(chunks)
+    return data
+
+
 def write_to_file(file_fd: io.FileIO, data: bytes, f_sync: bool = False):
-    length_to_write = len(data)
-    written = 0
-    while written < length_to_write:
-        written = file_fd.write(data[written:])
+    written = file_fd.write(data)  # mostly done by one write, data isn't sliced (copied) for it
+    if written < len(data):
+        with memoryview(data) as view:
+            while written < len(view):
+                written += file_fd.write(view[written:])
     if f_sync:
         file_flush_and_sync(file_fd)
 
@@ -59,7 +88,8 @@ def generate_address(data):
     """
     if not isinstance(data, str):
         data = str(data)
-    return hash(data) ^ (hash(data) >> 2)
+    h = hash(data)  # str caches its hash, but computing it once still saves a call
+    return h ^ (h >> 2)
 
 
 def is_power_of_2(num: int) -> bool:
@@ -95,11 +125,18 @@ class FakeCache(object):
     def __setitem__(self, key, value):
         pass
 
+    def __contains__(self, key):
+        return False
+
     def clear(self):
         pass
 
 
-class LRUCache(dict):
+class LRUCache(OrderedDict):
+    """
+    Order of keys is the LRU queue, least recently used first. OrderedDict moves a key to the tail
+    in O(1) by its linked list, a plain list had to be scanned to find the key on every access.
+    """
 
     def __init__(self, *args, **kwargs):
         """
@@ -108,7 +145,6 @@ class LRUCache(dict):
         """
 
         self.capacity = kwargs.pop('capacity', None) or float('nan')
-        self.lru = []
 
         super(LRUCache, self).__init__(*args, **kwargs)
 
@@ -116,38 +152,32 @@ class LRUCache(dict):
         """
         Push a key to the tail of the LRU queue
         """
-        if key in self.lru:
-            self.lru.remove(key)
-        self.lru.append(key)
+        self.move_to_end(key)
 
     def get(self, key, default=None):
-        item = super(LRUCache, self).get(key, default)
-        self.refresh(key)
+        try:
+            item = super(LRUCache, self).__getitem__(key)
+        except KeyError:
+            return default
+        self.move_to_end(key)
 
         return item
 
     def __getitem__(self, key):
         item = super(LRUCache, self).__getitem__(key)
-        self.refresh(key)
+        self.move_to_end(key)
 
         return item
 
     def __setitem__(self, key, value):
         super(LRUCache, self).__setitem__(key, value)
 
-        self.refresh(key)
+        self.move_to_end(key)
 
         # Check, if the cache is full and we have to remove old items
         if len(self) > self.capacity:
-            self.pop(self.lru.pop(0))
-
-    def __delitem__(self, key):
-        super(LRUCache, self).__delitem__(key)
-        self.lru.remove(key)
-
-    def clear(self):
-        super(LRUCache, self).clear()
-        del self.lru[:]
+            # not `popitem`, it looks the item up by `__getitem__` of subclasses, which refreshes it first.
+            super(LRUCache, self).__delitem__(next(iter(self)))
 
 
 def with_metaclass(meta, *bases):
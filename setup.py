@@ -42,6 +42,9 @@ setup(
         'redis',
         'pycryptodome'
     ],
+    extras_require={
+        'orjson': ['orjson']  # faster decoding of dict and list values, they're always encoded by json
+    },
     platforms='any',
     python_requires=">=3.5",
     classifiers=[
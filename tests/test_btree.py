@@ -1,6 +1,8 @@
 import random
 
-from tests.util import refine_test_file
+import pytest
+
+from tests.util import refine_test_file, fresh_test_file
 
 from cannondb.btree import BTree
 
@@ -21,6 +23,9 @@ def test_normal_insert():
     assert tree.get('123') == 'python'
     assert tree.get('list') == [2, 3, 4]
     assert tree.get('dict') == {1: 1, 2: 2, 3: 3}
+    assert tree.get('missing') is None and tree.get('missing', 0) == 0
+    assert 'a' in tree and 'missing' not in tree
+    assert repr(tree).startswith('<Leaf')
     tree.close()
 
 
@@ -93,5 +98,132 @@ def test_overflow():
     assert test_tree['6789'] == 6789
 
 
+def test_overflow_deprecated():
+    file_name = fresh_test_file('test_overflow_deprecated')
+    # nodes of 20 pairs overflow a page of 256 bytes, their chains are dropped as they shrink.
+    tree = BTree(file_name, order=20, page_size=256, key_size=8, value_size=8, cache_size=0)
+    for i in range(200):
+        tree.insert(i, i)
+    for i in range(0, 200, 2):
+        tree.remove(i)
+    tree.close()
+    tree = BTree(file_name, order=20, page_size=256, key_size=8, value_size=8, cache_size=0)
+    assert tree.keys() == list(range(1, 200, 2))
+    tree.close()
+
+
+def test_bulk_load():
+    file_name = fresh_test_file('test_bulk_load')
+    pairs = [(str(i).zfill(5), i) for i in range(2000)]
+    random.shuffle(pairs)
+    tree = BTree(file_name, order=4, page_size=256, key_size=8, value_size=8)
+    tree.bulk_load(pairs)
+    assert tree.keys() == sorted(key for key, _ in pairs)
+    tree.insert('99999', -1)
+    tree.remove('00000')
+    tree.close()
+    tree = BTree(file_name, order=4, page_size=256, key_size=8, value_size=8)
+    assert tree['00001'] == 1 and tree['99999'] == -1 and '00000' not in tree
+    assert len(tree) == len(pairs)
+    assert list(tree.range('00100', '00104')) == [('00100', 100), ('00101', 101), ('00102', 102), ('00103', 103)]
+    assert list(tree.range(stop='00003')) == tree.items()[:2] and list(tree.range('99999')) == [('99999', -1)]
+    tree.close()
+
+
+def test_multi_insert():
+    file_name = fresh_test_file('test_multi_insert')
+    pairs = [(str(i).zfill(5), i) for i in range(1000)]
+    tree = BTree(file_name, order=4, page_size=256, key_size=8, value_size=8, cache_size=0)
+    tree.multi_insert(pairs)
+    assert tree['00500'] == 500
+    tree.close()
+    tree = BTree(file_name, order=4, page_size=256, key_size=8, value_size=8, cache_size=0)
+    assert tree.keys() == [key for key, _ in pairs]
+    # runs falling between existing keys, and a repeated key overriding the one before it
+    more = [(str(i).zfill(5) + 'x', i) for i in range(0, 1000, 3)] + [('00999x', -1), ('00001', -1)]
+    tree.multi_insert(more, override=True)
+    assert tree['00999x'] == -1 and tree['00001'] == -1 and tree['00300x'] == 300
+    assert tree.keys() == sorted(set(key for key, _ in pairs + more))
+    with pytest.raises(ValueError):
+        tree.multi_insert([('00002', 0)])
+    tree.multi_insert({'00004y': 4, '00002y': 2, '00001': -2}, override=True)
+    assert tree['00001'] == -2 and tree['00004y'] == 4 and \
+        tree.keys()[:9] == ['00000', '00000x', '00001', '00002', '00002y', '00003', '00003x', '00004', '00004y']
+    tree.close()
+    # empty tree is built at once, keys repeated in batch are overridden or rejected the same way
+    tree = BTree(fresh_test_file('test_multi_insert_empty'), order=4, page_size=256, key_size=8, value_size=8)
+    with pytest.raises(ValueError):
+        tree.multi_insert([('b', 1), ('a', 1), ('b', 2)])
+    tree.multi_insert([('b', 1), ('a', 1), ('b', 2)], override=True)
+    assert tree.items() == [('a', 1), ('b', 2)]
+    tree.close()
+
+
+def test_multi_insert_odd_order():
+    # nodes merged by removes of odd order hold `order + 1` pairs, runs inserted into them are split right away.
+    tree = BTree(fresh_test_file('test_multi_insert_odd'), order=3)
+    for i in range(1, 6):
+        tree.insert(i, i)
+    tree.remove(1)
+    tree.multi_insert({1: 1})
+    assert tree.keys() == [1, 2, 3, 4, 5]
+    tree.close()
+    tree = BTree(fresh_test_file('test_multi_insert_odd'), order=5, page_size=256, key_size=8, value_size=8)
+    rand, expected = random.Random(5), {}
+    for _ in range(3000):
+        op = rand.random()
+        if op < 0.4:
+            key = rand.randrange(500)
+            tree.insert(key, key, override=True)
+            expected[key] = key
+        elif op < 0.7 and expected:
+            key = rand.choice(list(expected))
+            tree.remove(key)
+            del expected[key]
+        else:
+            batch = {rand.randrange(500): -1 for _ in range(rand.randrange(1, 20))}
+            tree.multi_insert(batch, override=True)
+            expected.update(batch)
+    assert tree.items() == sorted(expected.items())
+    tree.close()
+
+
+def test_merged_deprecated():
+    file_name = fresh_test_file('test_merged_deprecated')
+    # pages of nodes consolidated by removes are reused by splits, file doesn't grow with churn.
+    tree = BTree(file_name, order=4, page_size=256, key_size=8, value_size=8, cache_size=64)
+    for _ in range(3):
+        for i in range(300):
+            tree.insert(i, i, override=True)
+        last_page = tree.handler.last_page
+        for i in range(300):
+            tree.remove(i)
+    assert tree.handler.last_page == last_page and not tree.keys()
+    for i in range(100):
+        tree.insert(i, i)
+    tree.close()
+    tree = BTree(file_name, order=4, page_size=256, key_size=8, value_size=8, cache_size=64)
+    assert tree.items() == [(i, i) for i in range(100)]
+    tree.close()
+
+
+def test_iterate_small_cache():
+    file_name = fresh_test_file('test_iterate_small_cache')
+    rnd, expected = random.Random(4), {}
+    for _ in range(2):
+        tree = BTree(file_name, order=4, page_size=128, key_size=8, value_size=16, cache_size=16)
+        for _ in range(150):
+            key, value = str(rnd.randrange(0, 2000)), 'v' * rnd.randrange(0, 8)
+            tree.insert(key, value, override=True)
+            expected[key] = value
+            if rnd.random() < 0.4:
+                key = rnd.choice(sorted(expected))
+                tree.remove(key)
+                del expected[key]
+        # branches walked are evicted from cache under the walk, the walk still yields every item once
+        assert tree.items() == sorted(expected.items())
+        tree.close()
+
+
 if __name__ == '__main__':
     __test_scale_insert()
@@ -26,9 +26,56 @@ def test_load_dump():
     node = BNode(test_tree, test_tree_conf, contents=test_contents, children=test_children)
     dumped = node.dump()
     loaded_node = BNode(test_tree, test_tree_conf, data=dumped)
+    assert loaded_node.dump() == dumped
+    assert loaded_node.next_page is None
+    assert BNode(test_tree, test_tree_conf, data=memoryview(dumped)).dump() == dumped
     print(repr(loaded_node))
 
 
+def test_lazy_load():
+    node = BNode(test_tree, test_tree_conf, contents=test_contents, children=test_children)
+    loaded_node = BNode(test_tree, test_tree_conf, data=node.dump())
+    assert not loaded_node.contents.materialized()
+    assert loaded_node.bisect('3') == 2 and loaded_node.key_at(2) == '3'
+    assert loaded_node.bisect('0') == 0 and loaded_node.bisect('6') == len(test_contents)
+    assert loaded_node.value_at(2) == test_contents[2].value
+    assert not loaded_node.contents.materialized()  # searching decodes keys only, lookups decode values only
+    assert loaded_node.contents[1].key == '2'
+    assert len(loaded_node.contents.materialized()) == 1
+    assert list(loaded_node.iter_items()) == [(pair.key, pair.value) for pair in test_contents]
+    assert len(loaded_node.contents.materialized()) == 1  # scanning builds no pairs
+    assert [pair.key for pair in loaded_node.contents[2:]] == ['3', '4', '5']
+    assert [pair.key for pair in loaded_node.contents] == [pair.key for pair in test_contents]
+    assert len(loaded_node.contents.materialized()) == len(test_contents)
+
+
+def test_key_list():
+    contents = BNode(test_tree, test_tree_conf, data=BNode(test_tree, test_tree_conf, contents=test_contents,
+                                                            children=test_children).dump()).contents
+    for _ in range(contents.KEY_LIST_SEARCHES):
+        assert contents.bisect_left('3') == 2
+    # key column is built now, and kept in step with pairs
+    contents.insert(0, KeyValPair(test_tree_conf, '0', 0))
+    contents.pop(3)
+    contents[1] = KeyValPair(test_tree_conf, '15', 15)
+    contents.append(KeyValPair(test_tree_conf, '6', 6))
+    assert [contents.key_at(i) for i in range(len(contents))] == [pair.key for pair in contents] == \
+        ['0', '15', '2', '4', '5', '6']
+    assert contents.bisect_left('3') == 3
+    assert contents.find('3') == (3, False) and contents.find('4') == (3, True) and contents.find('7') == (6, False)
+
+
+def test_bisect():
+    node = BNode(test_tree, test_tree_conf, contents=test_contents, children=test_children)
+    assert [node.bisect(k) for k in ('0', '1', '25', '5', '6')] == [0, 0, 2, 4, 5]
+    assert node.key_at(4) == '5'
+    assert [node.find(k) for k in ('0', '25', '5', '6')] == [(0, False), (2, False), (4, True), (5, False)]
+    lazy = BNode(test_tree, test_tree_conf, data=node.dump())
+    assert [lazy.find(k) for k in ('0', '25', '5', '6')] == [(0, False), (2, False), (4, True), (5, False)]
+    assert list(lazy.iter_keys()) == list(node.iter_keys()) == [pair.key for pair in test_contents]
+    assert list(lazy.iter_keys(3)) == list(node.iter_keys(3)) == [pair.key for pair in test_contents[3:]]
+
+
 def test_split():
     node = BNode(test_tree, test_tree_conf, contents=test_contents, children=test_children)
     sib, mid = node.split()
@@ -57,5 +104,18 @@ def test_ops_in_dump():
     node.update_content_in_dump(0, for_op)
 
 
+def test_truncate_extend_in_dump():
+    node = BNode(test_tree, test_tree_conf, contents=list(test_contents), children=list(test_children))
+    whole = node.dump()
+    node.contents, node.children = node.contents[:2], node.children[:3]
+    node.truncate_in_dump()
+    assert node.dump() == BNode(test_tree, test_tree_conf, contents=test_contents[:2],
+                                children=test_children[:3]).dump()
+    node.contents.extend(test_contents[2:])
+    node.children.extend(test_children[3:])
+    node.extend_in_dump(test_contents[2:], test_children[3:])
+    assert node.dump() == whole
+
+
 test_tree.commit()
 test_tree.close()
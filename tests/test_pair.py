@@ -49,3 +49,56 @@ def test_dict():
     assert len(as_bytes) == orig.length
     after = KeyValPair(tree_conf, data=as_bytes)
     assert after.key == test_key and after.value == test_val
+
+
+def test_update_in_dump():
+    orig = KeyValPair(tree_conf, 'test', 'a long value')
+    orig.dump()
+    orig.value = 'short'
+    after = KeyValPair(tree_conf, data=orig.dump())
+    assert after.value == 'short'
+    assert after.dump() == KeyValPair(tree_conf, 'test', 'short').dump()
+
+
+def test_update_key_in_dump():
+    orig = KeyValPair(tree_conf, 'a long key', 'value')
+    orig.dump()
+    orig.key = 'key'
+    assert orig.dump() == KeyValPair(tree_conf, 'key', 'value').dump()
+    loaded = KeyValPair(tree_conf, data=orig.dump())
+    loaded.dump()
+    loaded.value = 'new value'  # value of loaded pair is replaced without being decoded
+    assert loaded.dump() == KeyValPair(tree_conf, 'key', 'new value').dump()
+
+
+def test_change_value_type():
+    orig = KeyValPair(tree_conf, 'test', 1)
+    orig.dump()
+    orig.value = 'now a str'
+    after = KeyValPair(tree_conf, data=orig.dump())
+    assert after.value == 'now a str'
+
+
+def test_compare():
+    a, b = KeyValPair(tree_conf, 'a', 1), KeyValPair(tree_conf, 'b', 1)
+    assert a < b and a <= b and b > a and b >= a and a != b
+    assert a < 'b' and a <= 'a' and a >= 'a' and b > 'a' and a == 'a'
+    assert KeyValPair(tree_conf, 'a', 2) != a
+    assert KeyValPair(tree_conf, 'a', 1) == a
+
+
+def test_dump_into():
+    orig = KeyValPair(tree_conf, 'test', 'into buffer')
+    buf = bytearray(orig.length + 3)
+    orig.dump_into(buf, 3)
+    assert bytes(buf[3:]) == orig.dump()
+    orig.dump_into(buf, 3)  # from dump cache this time
+    assert bytes(buf[3:]) == orig.dump()
+
+
+def test_lazy_value():
+    as_bytes = KeyValPair(tree_conf, 'test', 'decoded later').dump()
+    after = KeyValPair(tree_conf, data=as_bytes)
+    assert after.dump() == as_bytes  # dumped from raw value bytes, without decoding it
+    assert after.value == 'decoded later'
+    assert after == KeyValPair(tree_conf, 'test', 'decoded later')
@@ -1,6 +1,15 @@
+import importlib.util
+import math
+import sys
+from datetime import datetime
 from uuid import UUID
+
+import pytest
+
+import cannondb.serializer
 from cannondb.serializer import IntSerializer, FloatSerializer, DictSerializer, ListSerializer, StrSerializer, \
-    UUIDSerializer
+    UUIDSerializer, serializer_switcher, type_switcher, num_serializer_switcher, \
+    serializer_info
 
 
 def test_int_serializer():
@@ -52,6 +61,10 @@ def test_list_serializer():
     s = ListSerializer.serialize((1, 2, 3, 4, 5))
     assert ListSerializer.deserialize(s) == [1, 2, 3, 4, 5]
 
+    s = ListSerializer.serialize([2 ** 70, -2 ** 63 - 1, {1: 'a'}])
+    assert ListSerializer.deserialize(s) == [2 ** 70, -2 ** 63 - 1, {'1': 'a'}]
+    assert ListSerializer.deserialize(b'[1, "a", {"b": 2}]') == [1, 'a', {'b': 2}]  # written by json
+
 
 def test_uuid_serializer():
     u = UUID('{12345678-1234-5678-1234-567812345678}')
@@ -60,3 +73,41 @@ def test_uuid_serializer():
     u = UUID('urn:uuid:12345678-1234-5678-1234-567812345678')
     s = UUIDSerializer.serialize(u)
     assert u.int == UUIDSerializer.deserialize(s).int
+
+
+def test_num_serializer_switcher():
+    for t in (int, float, str, dict, list, UUID):
+        assert num_serializer_switcher(type_switcher(t)) is serializer_switcher(t)
+
+
+def test_serializer_info():
+    for t in (int, float, str, dict, list, UUID):
+        assert serializer_info(t) == (serializer_switcher(t), type_switcher(t))
+
+
+def _serializer_without_orjson():
+    """a separate copy of cannondb.serializer loaded as if orjson was not installed"""
+    spec = importlib.util.spec_from_file_location('_serializer_without_orjson', cannondb.serializer.__file__)
+    module = importlib.util.module_from_spec(spec)
+    orjson = sys.modules.get('orjson')
+    sys.modules['orjson'] = None  # makes `import orjson` raise ImportError
+    try:
+        spec.loader.exec_module(module)
+    finally:
+        if orjson is None:
+            del sys.modules['orjson']
+        else:
+            sys.modules['orjson'] = orjson
+    return module
+
+
+def test_json_same_with_or_without_orjson():
+    without = _serializer_without_orjson()
+    assert without.orjson is None
+    for module in (cannondb.serializer, without):
+        s = module.ListSerializer.serialize([float('nan'), float('inf')])
+        assert s == without.ListSerializer.serialize([float('nan'), float('inf')])
+        nan, inf = module.ListSerializer.deserialize(s)
+        assert math.isnan(nan) and inf == float('inf')
+        with pytest.raises(TypeError):
+            module.DictSerializer.serialize({'at': datetime(2018, 1, 1)})
@@ -0,0 +1,40 @@
+import threading
+
+import pytest
+
+from cannondb.storages import MemoryStorage
+
+
+def test_memory_storage():
+    storage = MemoryStorage()
+    storage.insert('a', 1)
+    storage.insert('b', [1, 2])
+    with pytest.raises(ValueError):
+        storage.insert('a', 2)
+    storage.insert('a', 2, override=True)
+    assert storage.get('a') == 2 and storage.get('c') is None and storage.get('c', 3) == 3
+    keys = storage.keys()
+    storage.remove('b')
+    assert keys == ['a', 'b']  # snapshot, not changed by writes afterwards
+    assert storage.items() == [('a', 2)] and storage.values() == [2]
+    storage.insert('c', 3)
+    assert list(storage.range('b')) == [('c', 3)] and list(storage.range(stop='c')) == [('a', 2)]
+    with pytest.raises(KeyError):
+        storage.remove('b')
+
+
+def test_memory_storage_threads():
+    storage = MemoryStorage()
+
+    def write(base):
+        for i in range(base, base + 500):
+            storage.insert(i, i)
+        for i in range(base, base + 500, 2):
+            storage.remove(i)
+
+    threads = [threading.Thread(target=write, args=(base,)) for base in range(0, 4000, 500)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(storage.keys()) == list(range(1, 4000, 2))
@@ -0,0 +1,18 @@
+from cannondb.utils import LRUCache
+
+
+def test_lru_cache():
+    cache = LRUCache(capacity=2)
+    cache[1], cache[2] = 'a', 'b'
+    assert cache.get(1) == 'a' and cache.get(3) is None and 3 not in cache
+    cache[3] = 'c'  # 2 is least recently used now
+    assert 2 not in cache and cache[1] == 'a' and cache[3] == 'c'
+    del cache[1]
+    cache[4] = 'd'
+    assert list(cache) == [3, 4]
+    cache.clear()
+    assert not cache and cache.get(3, 'x') == 'x'
+    unlimited = LRUCache()
+    for i in range(100):
+        unlimited[i] = i
+    assert len(unlimited) == 100
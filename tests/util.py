@@ -5,3 +5,12 @@ def refine_test_file(file_name):
     if not os.path.exists('tmp'):
         os.mkdir('tmp')
     return os.path.join('tmp', file_name)
+
+
+def fresh_test_file(file_name):
+    """test file with data and wal left by former runs removed"""
+    file_name = refine_test_file(file_name)
+    for suffix in ('.cdb', '.cdb.wal'):
+        if os.path.exists(file_name + suffix):
+            os.remove(file_name + suffix)
+    return file_name